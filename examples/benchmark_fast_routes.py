@@ -0,0 +1,111 @@
+"""Compare `/predict` latency with and without `fast_routes`
+
+Requests are sent straight to the ASGI app, without a server or HTTP client,
+so the timings cover only vetiver, FastAPI and the model. Run with
+
+    python examples/benchmark_fast_routes.py --requests 5000 --rows 1
+
+With `--noop`, the endpoint skips the prototype check and returns a constant,
+leaving only the cost of handling the request and response.
+"""
+
+import argparse
+import asyncio
+import json
+from time import perf_counter
+
+from vetiver import mock, VetiverAPI, VetiverModel
+
+
+def make_scope(body: bytes) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/predict",
+        "raw_path": b"/predict",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+async def call(app, body: bytes) -> int:
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = None
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(make_scope(body), receive, send)
+    return status
+
+
+async def bench(app, body: bytes, requests: int) -> list:
+    # the first requests start the thread pool and warm up the model
+    for _ in range(100):
+        assert await call(app, body) == 200
+    timings = []
+    for _ in range(requests):
+        start = perf_counter()
+        await call(app, body)
+        timings.append(perf_counter() - start)
+    return sorted(timings)
+
+
+def noop(data):
+    return [0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=1)
+    parser.add_argument("--noop", action="store_true")
+    args = parser.parse_args()
+
+    X, y = mock.get_mock_data()
+    model = VetiverModel(
+        mock.get_mock_model().fit(X, y), model_name="my_model", prototype_data=X
+    )
+    rows = X.sample(args.rows, replace=True, random_state=1)
+    body = json.dumps(rows.to_dict("records")).encode()
+
+    for fast_routes in (False, True):
+        # the event loop executor keeps thread handoffs out of the comparison
+        api = VetiverAPI(
+            model,
+            check_prototype=not args.noop,
+            fast_routes=fast_routes,
+            executor="event_loop",
+            cancel_on_disconnect=False,
+        )
+        if args.noop:
+            api.vetiver_post(noop, "predict")
+        timings = asyncio.run(bench(api.app, body, args.requests))
+        mean = sum(timings) / len(timings)
+        print(
+            f"fast_routes={fast_routes!s:<5} "
+            f"mean {mean * 1e6:7.1f} us  "
+            f"p50 {timings[len(timings) // 2] * 1e6:7.1f} us  "
+            f"p99 {timings[int(len(timings) * 0.99)] * 1e6:7.1f} us  "
+            f"{1 / mean:8.0f} req/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import asyncio
+from collections import deque
+from time import perf_counter
+
+
+class AdmissionLimiter:
+    """Limit concurrent requests, with a bounded queue for the overflow
+
+    Up to `max_concurrency` requests run at once and up to `max_queue` more
+    wait for a free slot, in arrival order. Any others are rejected right away.
+
+    Parameters
+    ----------
+    max_concurrency : int
+        Maximum number of requests running at once.
+    max_queue : int
+        Maximum number of requests waiting for a slot.
+
+    Attributes
+    ----------
+    active : int
+        Number of requests running
+    rejected : int
+        Number of requests turned away because the queue was full
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int = 0):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.rejected = 0
+        self._waiters = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Wait for a slot, returning False if the request is rejected instead"""
+        if self.active < self.max_concurrency:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just before cancelling, pass it on
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+        return True
+
+    def release(self):
+        """Free a slot, handing it to the next waiting request if there is one"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that sheds load once a limiter's queue is full
+
+    POST requests, the prediction endpoints, go through `post_limiter`, and all
+    other HTTP requests go through `get_limiter`, so cheap routes such as `/ping`
+    keep answering while predictions are saturated. Rejected requests get a
+    503 response with a `Retry-After` header.
+
+    Parameters
+    ----------
+    app :
+        ASGI application
+    post_limiter : AdmissionLimiter
+        Limiter for POST requests, or None for no limit
+    get_limiter : AdmissionLimiter
+        Limiter for all other requests, or None for no limit
+    retry_after : int
+        Seconds clients are asked to wait before retrying
+    """
+
+    def __init__(
+        self,
+        app,
+        post_limiter: AdmissionLimiter = None,
+        get_limiter: AdmissionLimiter = None,
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.post_limiter = post_limiter
+        self.get_limiter = get_limiter
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        # request deadlines count from here, including time in the queue
+        scope["vetiver.arrival"] = perf_counter()
+        limiter = self.post_limiter if scope["method"] == "POST" else self.get_limiter
+        if limiter is None:
+            return await self.app(scope, receive, send)
+
+        if not await limiter.acquire():
+            return await self._reject(send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def _reject(self, send):
+        body = b"Server is overloaded, retry later"
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,189 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+import numpy as np
+import pandas as pd
+
+
+class MicroBatcher:
+    """Combine concurrent requests into a single prediction call
+
+    Requests are collected until `max_rows` rows are waiting or `timeout_ms`
+    milliseconds have passed since the first request in the batch arrived.
+    The collected DataFrames are concatenated, `predict` is called once, and
+    the output is split back into one result per request.
+
+    Parameters
+    ----------
+    predict : Callable
+        Coroutine function that takes a DataFrame and returns one prediction
+        per row, such as a list, np.ndarray, pd.Series or pd.DataFrame.
+    max_rows : int
+        Maximum number of rows in a single batch.
+    timeout_ms : float
+        Maximum time to wait for more requests before running a batch.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[pd.DataFrame], Awaitable],
+        max_rows: int,
+        timeout_ms: float = 5.0,
+    ):
+        if max_rows < 1:
+            raise ValueError("max_rows must be a positive integer")
+
+        self.predict = predict
+        self.max_rows = max_rows
+        self.timeout_ms = timeout_ms
+        self._loop = None
+        self._queue = None
+        self._worker = None
+
+    async def submit(self, data: pd.DataFrame):
+        """Queue data for the next batch and wait for its predictions"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # queues and tasks belong to a single event loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+
+        future = loop.create_future()
+        await self._queue.put((data, future))
+
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout_ms / 1000
+
+        while True:
+            batch = [await self._queue.get()]
+            rows = len(batch[0][0])
+            deadline = loop.time() + timeout
+
+            while rows < self.max_rows:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            # the next batch starts collecting while this one runs
+            loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        # skip requests that were cancelled while waiting, eg. at their deadline
+        batch = [(data, future) for data, future in batch if not future.done()]
+        if not batch:
+            return
+        frames = [data for data, _ in batch]
+        futures = [future for _, future in batch]
+
+        try:
+            data = (
+                frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            )
+            output = await self.predict(data)
+            results = _split(output, [len(frame) for frame in frames])
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            # requests can be cancelled while waiting, eg. if the client disconnects
+            if not future.done():
+                future.set_result(result)
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key
+
+    Unlike a cache, results are only shared while the call is running. Once it
+    finishes, the next caller with the same key starts a new call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn: Callable[[], Awaitable]):
+        """Await `fn()`, or the running call for `key` if there is one"""
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        # one caller going away must not cancel the call for everyone else
+        return await asyncio.shield(future)
+
+
+async def run_in_chunks(predict: Callable, data: pd.DataFrame, chunk_rows: int):
+    """Predict `chunk_rows` rows at a time, joining the outputs
+
+    Chunks run one after another, so the memory used by `predict` depends on
+    the chunk size rather than the size of `data`. Inputs of at most
+    `chunk_rows` rows are passed through as they are.
+
+    Parameters
+    ----------
+    predict : Callable
+        Coroutine function that takes a DataFrame and returns one prediction
+        per row, such as a list, np.ndarray, pd.Series or pd.DataFrame.
+    data : pd.DataFrame
+        Input data
+    chunk_rows : int
+        Maximum number of rows passed to `predict` at once.
+    """
+    if len(data) <= chunk_rows:
+        return await predict(data)
+
+    pieces = []
+    for start in range(0, len(data), chunk_rows):
+        stop = start + chunk_rows
+        chunk = data.iloc[start:stop]
+        output = await predict(chunk)
+        if len(output) != len(chunk):
+            raise ValueError(
+                f"Chunked endpoints must return one prediction per row, expected "
+                f"{len(chunk)} but got {len(output)}"
+            )
+        pieces.append(output)
+
+    return _join(pieces)
+
+
+def _join(pieces: list):
+    """Join consecutive pieces of output, the reverse of `_split`"""
+    first = pieces[0]
+    if isinstance(first, (pd.Series, pd.DataFrame)):
+        return pd.concat(pieces, ignore_index=True)
+    if isinstance(first, np.ndarray):
+        return np.concatenate(pieces)
+    return [item for piece in pieces for item in piece]
+
+
+def _split(output, sizes: List[int]) -> list:
+    """Split batched output into consecutive pieces of the given sizes"""
+    if len(output) != sum(sizes):
+        raise ValueError(
+            f"Batched endpoints must return one prediction per row, expected "
+            f"{sum(sizes)} but got {len(output)}"
+        )
+
+    bounds = np.cumsum([0] + sizes)
+    pieces = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if isinstance(output, (pd.Series, pd.DataFrame)):
+            pieces.append(output.iloc[start:stop].reset_index(drop=True))
+        else:
+            pieces.append(output[start:stop])
+
+    return pieces
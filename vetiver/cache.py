@@ -0,0 +1,146 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+_MISSING = object()
+
+
+def row_keys(data: pd.DataFrame) -> list:
+    """Hash each row of validated input data
+
+    Rows are hashed by value and dtype, so data should already be coerced to
+    the prototype's types and column order.
+    """
+    return pd.util.hash_pandas_object(data, index=False).to_numpy().tolist()
+
+
+def split_rows(output) -> list:
+    """Split endpoint output into one item per input row"""
+    if isinstance(output, pd.DataFrame):
+        return [output.iloc[[i]] for i in range(len(output))]
+    if isinstance(output, pd.Series):
+        return output.tolist()
+    return list(output)
+
+
+def combine_rows(rows: list, kind: type):
+    """Combine row items into output of type `kind`"""
+    if issubclass(kind, pd.DataFrame):
+        return pd.concat(rows, ignore_index=True)
+    if issubclass(kind, pd.Series):
+        return pd.Series(rows)
+    if issubclass(kind, np.ndarray):
+        return np.asarray(rows)
+    return rows
+
+
+class PredictionCache:
+    """Least recently used cache of per-row predictions
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of rows to keep.
+    ttl : float
+        Seconds before an entry expires. Entries never expire if None.
+
+    Attributes
+    ----------
+    hits : int
+        Number of rows served from the cache
+    misses : int
+        Number of rows that had to be predicted
+    """
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._rows = OrderedDict()
+        # type of the endpoint's output, to rebuild it from cached rows
+        self._kind = list
+
+    def check_version(self, version):
+        """Clear the cache if the model version has changed"""
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def clear(self):
+        self._rows.clear()
+
+    def get_many(self, keys) -> list:
+        """Look up rows, returning `_MISSING` for rows not in the cache"""
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            entry = self._rows.get(key)
+            if entry is not None and entry[1] is not None and entry[1] < now:
+                del self._rows[key]
+                entry = None
+            if entry is None:
+                values.append(_MISSING)
+                continue
+            self._rows.move_to_end(key)
+            values.append(entry[0])
+
+        misses = sum(value is _MISSING for value in values)
+        self.misses += misses
+        self.hits += len(values) - misses
+
+        return values
+
+    def put_many(self, keys, values):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        for key, value in zip(keys, values):
+            self._rows[key] = (value, expires)
+            self._rows.move_to_end(key)
+        while len(self._rows) > self.maxsize:
+            self._rows.popitem(last=False)
+
+    def info(self) -> dict:
+        """Hit and miss counts, and current size"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._rows),
+            "maxsize": self.maxsize,
+        }
+
+    async def predict(self, data: pd.DataFrame, predict):
+        """Serve cached rows and predict the rest in one call
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            Validated input data
+        predict : Callable
+            Coroutine function that takes a DataFrame and returns one
+            prediction per row
+        """
+        keys = row_keys(data)
+        values = self.get_many(keys)
+        missing = [i for i, value in enumerate(values) if value is _MISSING]
+        if not missing:
+            return combine_rows(values, self._kind)
+
+        output = await predict(data.iloc[missing].reset_index(drop=True))
+        rows = split_rows(output)
+        if len(rows) != len(missing):
+            raise ValueError(
+                f"Cached endpoints must return one prediction per row, expected "
+                f"{len(missing)} but got {len(rows)}"
+            )
+        self._kind = type(output)
+        self.put_many([keys[i] for i in missing], rows)
+        for i, row in zip(missing, rows):
+            values[i] = row
+
+        return combine_rows(values, self._kind)
@@ -0,0 +1,157 @@
+import asyncio
+import random
+from time import perf_counter
+from typing import Awaitable, Callable
+
+import numpy as np
+import pandas as pd
+
+from .metrics import Histogram
+
+
+class TrafficSplit:
+    """Send part of an endpoint's traffic to a candidate model
+
+    A `fraction` of requests is answered by the candidate instead of the
+    primary model. With `shadow`, requests answered by the primary model are
+    also scored by the candidate in the background, and the two outputs are
+    compared row by row. Shadow scoring never delays the primary response, and
+    is skipped when `max_in_flight` shadow calls are already running.
+
+    Parameters
+    ----------
+    candidate_predict : Callable
+        Coroutine function that takes validated data and returns the
+        candidate's predictions
+    fraction : float
+        Share of requests, between 0 and 1, answered by the candidate.
+    shadow : bool
+        Whether to also score requests answered by the primary model with the
+        candidate, to compare their outputs.
+    max_in_flight : int
+        Maximum number of shadow calls running at once.
+    """
+
+    def __init__(
+        self,
+        candidate_predict: Callable[[pd.DataFrame], Awaitable],
+        fraction: float = 0.0,
+        shadow: bool = False,
+        max_in_flight: int = 4,
+    ):
+        if not 0 <= fraction <= 1:
+            raise ValueError("fraction must be between 0 and 1")
+
+        self.candidate_predict = candidate_predict
+        self.fraction = fraction
+        self.shadow = shadow
+        self.max_in_flight = max_in_flight
+        self.primary_latency = Histogram()
+        self.candidate_latency = Histogram()
+        self.primary_requests = 0
+        self.canary_requests = 0
+        self.shadow_requests = 0
+        self.shadow_dropped = 0
+        self.candidate_errors = 0
+        self.compared_rows = 0
+        self.disagreeing_rows = 0
+        self.abs_diff_sum = 0.0
+        self._tasks = set()
+
+    def use_candidate(self) -> bool:
+        """Decide whether the candidate answers this request"""
+        return self.fraction > 0 and random.random() < self.fraction
+
+    async def run_candidate(self, data):
+        """Answer a request with the candidate model"""
+        start = perf_counter()
+        try:
+            output = await self.candidate_predict(data)
+        except Exception:
+            self.candidate_errors += 1
+            raise
+        self.candidate_latency.observe(perf_counter() - start)
+        self.canary_requests += 1
+        return output
+
+    def record_primary(self, data, output, seconds: float):
+        """Record a primary response, and mirror it to the candidate if shadowing"""
+        self.primary_latency.observe(seconds)
+        self.primary_requests += 1
+        if not self.shadow:
+            return
+        if len(self._tasks) >= self.max_in_flight:
+            self.shadow_dropped += 1
+            return
+        task = asyncio.ensure_future(self._shadow(data, output))
+        # keep a reference so the task is not garbage collected while running
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _shadow(self, data, output):
+        start = perf_counter()
+        try:
+            candidate_output = await self.candidate_predict(data)
+        except Exception:
+            self.candidate_errors += 1
+            return
+        self.candidate_latency.observe(perf_counter() - start)
+        self.shadow_requests += 1
+
+        rows, disagreeing, abs_diff = _compare(output, candidate_output)
+        self.compared_rows += rows
+        self.disagreeing_rows += disagreeing
+        self.abs_diff_sum += abs_diff
+
+    def info(self) -> dict:
+        """Request counts, mean latencies and disagreement between the models"""
+        return {
+            "primary_requests": self.primary_requests,
+            "canary_requests": self.canary_requests,
+            "shadow_requests": self.shadow_requests,
+            "shadow_dropped": self.shadow_dropped,
+            "candidate_errors": self.candidate_errors,
+            "primary_mean_seconds": _mean(self.primary_latency),
+            "candidate_mean_seconds": _mean(self.candidate_latency),
+            "compared_rows": self.compared_rows,
+            "disagreeing_rows": self.disagreeing_rows,
+            "disagreement_rate": (
+                self.disagreeing_rows / self.compared_rows
+                if self.compared_rows
+                else None
+            ),
+            "mean_abs_diff": (
+                self.abs_diff_sum / self.compared_rows if self.compared_rows else None
+            ),
+        }
+
+
+def _mean(histogram: Histogram):
+    count = histogram.count
+    return histogram.sum / count if count else None
+
+
+def _compare(primary, candidate):
+    """Count rows where two outputs disagree, and their total absolute difference
+
+    Numeric outputs disagree where they are not close, others where they are
+    not equal. Outputs of different shapes disagree on every row.
+    """
+    primary = np.asarray(primary)
+    candidate = np.asarray(candidate)
+    rows = len(primary) if primary.ndim else 1
+    if primary.shape != candidate.shape:
+        return rows, rows, 0.0
+
+    if primary.dtype.kind in "biuf" and candidate.dtype.kind in "biuf":
+        primary = primary.astype(np.float64)
+        candidate = candidate.astype(np.float64)
+        differs = ~np.isclose(primary, candidate, equal_nan=True)
+        abs_diff = np.abs(primary - candidate).reshape(rows, -1).sum(axis=1)
+        abs_diff = float(np.nansum(abs_diff))
+    else:
+        differs = primary != candidate
+        abs_diff = 0.0
+
+    disagreeing = int(np.asarray(differs).reshape(rows, -1).any(axis=1).sum())
+    return rows, disagreeing, abs_diff
@@ -0,0 +1,247 @@
+import gzip
+import io
+import zlib
+
+from .formats import accepts_encoding
+from .limits import BodyTooLarge
+
+zstd_exists = True
+try:
+    import zstandard
+except ImportError:
+    zstd_exists = False
+
+
+def codings() -> list:
+    """Content codings that can be decoded and encoded, most preferred first"""
+    return ["zstd", "gzip"] if zstd_exists else ["gzip"]
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    """Compress a body with `gzip` or `zstd`"""
+    if coding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    if coding == "zstd":
+        if not zstd_exists:
+            raise ImportError("Cannot import `zstandard`.")
+        return zstandard.ZstdCompressor().compress(body)
+    raise ValueError(f"Unsupported content coding {repr(coding)}")
+
+
+def decompress(body: bytes, coding: str, max_size: int = None) -> bytes:
+    """Decompress a body with Content-Encoding `coding`
+
+    With `max_size`, decompression stops with `BodyTooLarge` as soon as the
+    output passes `max_size` bytes, so a small body cannot expand without bound.
+    """
+    coding = (coding or "identity").strip().lower()
+    if coding == "identity":
+        decoded = body
+    elif max_size is not None and coding in codings():
+        return _bounded_decompress(body, coding, max_size)
+    elif coding == "gzip":
+        decoded = gzip.decompress(body)
+    elif coding == "zstd" and zstd_exists:
+        # frames written by streaming compressors do not record their size
+        decoded = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    else:
+        raise ValueError(f"Unsupported content coding {repr(coding)}")
+    if max_size is not None and len(decoded) > max_size:
+        raise BodyTooLarge(max_size)
+    return decoded
+
+
+def _bounded_decompress(body: bytes, coding: str, max_size: int) -> bytes:
+    if coding == "gzip":
+        reader = gzip.GzipFile(fileobj=io.BytesIO(body))
+    else:
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body))
+    chunks = []
+    size = 0
+    with reader:
+        while True:
+            chunk = reader.read(65536)
+            if not chunk:
+                return b"".join(chunks)
+            size += len(chunk)
+            if size > max_size:
+                raise BodyTooLarge(max_size)
+            chunks.append(chunk)
+
+
+_DECODE_ERRORS = (OSError, EOFError, zlib.error) + (
+    (zstandard.ZstdError,) if zstd_exists else ()
+)
+
+
+def choose_coding(accept_encoding: str):
+    """Pick the preferred coding the client accepts, or None"""
+    for coding in codings():
+        if accepts_encoding(accept_encoding, coding):
+            return coding
+    return None
+
+
+def _compressor(coding: str):
+    if coding == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    return zstandard.ZstdCompressor().compressobj()
+
+
+def _flush(compressor, coding: str) -> bytes:
+    # emit everything compressed so far, without ending the stream
+    if coding == "gzip":
+        return compressor.flush(zlib.Z_SYNC_FLUSH)
+    return compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+class CompressionMiddleware:
+    """ASGI middleware that decodes request bodies and compresses responses
+
+    Request bodies with a `Content-Encoding` of `gzip`, or `zstd` when
+    `zstandard` is installed, are decompressed before they reach the endpoint.
+    Other encodings are rejected with a 415 status, bodies that cannot be
+    decoded with a 400 status, and bodies that decompress to more than
+    `max_size` bytes with a 413 status.
+
+    Responses of at least `minimum_size` bytes are compressed with the client's
+    preferred coding from its `Accept-Encoding` header, preferring `zstd` over
+    `gzip` when both are accepted. Streamed responses are compressed chunk by
+    chunk, so they still arrive as they are produced. Responses that already
+    have a `Content-Encoding` are left as they are.
+
+    Parameters
+    ----------
+    app :
+        ASGI application
+    minimum_size : int
+        Smallest response body, in bytes, that is compressed. Responses are not
+        compressed if None.
+    max_size : int
+        Largest decompressed request body accepted, in bytes, or None for no
+        limit.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, max_size: int = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        content_encoding = headers.get(b"content-encoding")
+        if content_encoding is not None:
+            content_coding = content_encoding.decode("latin-1").strip().lower()
+            if content_coding not in ("identity", *codings()):
+                return await self._reject(
+                    send, f"Unsupported content coding {repr(content_coding)}", 415
+                )
+            try:
+                scope, receive = await self._decoded(scope, receive, content_coding)
+            except BodyTooLarge as e:
+                return await self._reject(send, e.detail, 413)
+            except _DECODE_ERRORS as e:
+                return await self._reject(
+                    send, f"Could not decode request body: {e}", 400
+                )
+
+        coding = None
+        if self.minimum_size is not None:
+            coding = choose_coding(headers.get(b"accept-encoding", b"").decode())
+        if coding is None:
+            return await self.app(scope, receive, send)
+
+        await self.app(scope, receive, self._encoder(send, coding))
+
+    async def _decoded(self, scope, receive, coding: str):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = decompress(b"".join(chunks), coding, self.max_size)
+
+        headers = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        headers.append((b"content-length", str(len(body)).encode()))
+        sent = False
+
+        async def decoded_receive():
+            nonlocal sent
+            if sent:
+                # the body has been read, wait for the client to disconnect
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return dict(scope, headers=headers), decoded_receive
+
+    def _encoder(self, send, coding: str):
+        start = None
+        # decided by the first body message, "identity" or "stream"
+        mode = None
+        compressor = None
+
+        async def encoded_send(message):
+            nonlocal start, mode, compressor
+            if message["type"] == "http.response.start":
+                # hold the headers until the body shows whether to compress it
+                start = message
+                return
+            if message["type"] != "http.response.body" or mode == "identity":
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if mode == "stream":
+                chunk = compressor.compress(body)
+                chunk += _flush(compressor, coding) if more_body else compressor.flush()
+                return await send(dict(message, body=chunk))
+
+            headers = start.get("headers", [])
+            encoded = any(name.lower() == b"content-encoding" for name, _ in headers)
+            if encoded or (not more_body and len(body) < max(self.minimum_size, 1)):
+                mode = "identity"
+                await send(start)
+                return await send(message)
+
+            headers = [
+                (name, value)
+                for name, value in headers
+                if name.lower() != b"content-length"
+            ]
+            headers.append((b"content-encoding", coding.encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+            if more_body:
+                mode = "stream"
+                compressor = _compressor(coding)
+                body = compressor.compress(body) + _flush(compressor, coding)
+            else:
+                mode = "identity"
+                body = compress(body, coding)
+                headers.append((b"content-length", str(len(body)).encode()))
+            await send(dict(start, headers=headers))
+            await send(dict(message, body=body))
+
+        return encoded_send
+
+    async def _reject(self, send, detail: str, status: int):
+        body = detail.encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,599 @@
+import codecs
+import gzip
+import hashlib
+import json
+import math
+import re
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+import pydantic
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+
+from .helpers import api_data_to_frame
+from .prototype import PrototypeValidationError
+
+arrow_exists = True
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    arrow_exists = False
+
+orjson_exists = True
+try:
+    import orjson
+except ImportError:
+    orjson_exists = False
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+NDJSON = "application/x-ndjson"
+
+
+def _default(obj):
+    """Encode objects the JSON encoder does not handle natively"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    # same output as FastAPI's default response encoding
+    return jsonable_encoder(obj)
+
+
+def _widen(value):
+    # .tolist() turns float32 into Python floats, keep the same decimal output
+    if isinstance(value, np.ndarray) and value.dtype.kind == "f":
+        return value.astype(np.float64, copy=False)
+    return value
+
+
+def _finite(value):
+    """Replace NaN and infinite floats with None, as orjson writes them"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (str, int, type(None))):
+        return value
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return _finite(_default(value))
+
+
+def dumps(content) -> bytes:
+    """Encode content as JSON, writing NumPy arrays without `.tolist()`
+
+    Uses `orjson` when it is installed, and the standard library otherwise.
+    Either way, NaN and infinite values are written as `null`.
+    """
+    if isinstance(content, dict):
+        content = {key: _widen(value) for key, value in content.items()}
+    else:
+        content = _widen(content)
+
+    if orjson_exists:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    try:
+        text = json.dumps(
+            content, default=_default, separators=(",", ":"), allow_nan=False
+        )
+    except ValueError:
+        # only content with non-finite floats pays for the extra pass
+        text = json.dumps(_finite(content), separators=(",", ":"), allow_nan=False)
+    return text.encode()
+
+
+class VetiverJSONResponse(JSONResponse):
+    """JSON response that encodes NumPy output directly
+
+    Returning this response from an endpoint skips FastAPI's
+    `jsonable_encoder` pass over the content.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class StaticDocument:
+    """JSON document encoded once and served with a strong ETag
+
+    The body is encoded and gzipped when the document is created, so serving
+    it is only header checks.
+
+    Parameters
+    ----------
+    content :
+        JSON-serializable content of the document
+    """
+
+    def __init__(self, content):
+        self.body = dumps(content)
+        self.gzipped = gzip.compress(self.body, mtime=0)
+        digest = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        # each encoding is a different representation, so needs its own tag
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+    def response(self, if_none_match: str = None, accept_encoding: str = None):
+        """Build a response, or a 304 if the client's copy is current
+
+        Parameters
+        ----------
+        if_none_match : str
+            Value of the request's If-None-Match header
+        accept_encoding : str
+            Value of the request's Accept-Encoding header
+        """
+        use_gzip = accepts_encoding(accept_encoding, "gzip")
+        etag = self.gzip_etag if use_gzip else self.etag
+        headers = {"etag": etag, "vary": "Accept-Encoding"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            headers["content-encoding"] = "gzip"
+            return Response(
+                self.gzipped, media_type="application/json", headers=headers
+            )
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """Check if an Accept-Encoding header allows a content coding"""
+    for value in (accept_encoding or "").split(","):
+        name, _, params = value.partition(";")
+        if name.strip().lower() != coding:
+            continue
+        params = params.strip().lower()
+        if not params.startswith("q="):
+            return True
+        try:
+            return float(params[2:]) > 0
+        except ValueError:
+            return True
+    return False
+
+
+def media_type(content_type: str) -> str:
+    """Media type of a Content-Type header, without parameters"""
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def accepts(accept: str, media: str) -> bool:
+    """Check if an Accept header explicitly asks for a media type"""
+    return media in {media_type(value) for value in (accept or "").split(",")}
+
+
+def accepts_json(accept: str) -> bool:
+    """Check if an Accept header allows a JSON response"""
+    if not accept:
+        return True
+    allowed = {media_type(value) for value in accept.split(",")}
+    return not allowed.isdisjoint({"application/json", "application/*", "*/*"})
+
+
+def is_tabular(data) -> bool:
+    """Check if endpoint output can be written as Arrow columns"""
+    if isinstance(data, dict):
+        return bool(data) and all(
+            isinstance(value, (list, tuple, np.ndarray, pd.Series))
+            for value in data.values()
+        )
+    return isinstance(data, (pd.DataFrame, pd.Series, np.ndarray, list, tuple))
+
+
+def arrow_to_frame(body: bytes, columns: list = None) -> pd.DataFrame:
+    """Read an Arrow IPC stream into a DataFrame
+
+    Parameters
+    ----------
+    body : bytes
+        Request body in Arrow IPC streaming format
+    columns : list
+        If given, only these columns are converted, when present in the stream.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if not arrow_exists:
+        raise ImportError("Cannot import `pyarrow`.")
+
+    try:
+        table = pyarrow.ipc.open_stream(body).read_all()
+    except pyarrow.ArrowInvalid as e:
+        raise RequestValidationError(
+            [{"type": "arrow_invalid", "loc": ("body",), "msg": str(e)}]
+        )
+
+    if columns is not None:
+        # only convert the columns the model uses
+        names = set(table.schema.names)
+        table = table.select([name for name in columns if name in names])
+
+    return table.to_pandas()
+
+
+def validate(data: pd.DataFrame, validator=None) -> pd.DataFrame:
+    """Check a batch against a compiled prototype validator, if given"""
+    if validator is None:
+        return data
+    try:
+        return validator(data)
+    except PrototypeValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+def validate_records(records: list, prototype, start: int = 0) -> pd.DataFrame:
+    """Check records one at a time against a pydantic prototype
+
+    Used when a compiled validator cannot enforce every rule of the prototype,
+    such as custom validators. Errors are reported per row, as FastAPI does.
+
+    Parameters
+    ----------
+    records : list
+        List of dicts, one per row
+    prototype : vetiver.Prototype
+        Data prototype
+    start : int
+        Row number of the first record, used in error messages
+    """
+    rows = []
+    errors = []
+    for number, record in enumerate(records, start):
+        try:
+            rows.append(prototype(**record))
+        except pydantic.ValidationError as e:
+            errors.extend(
+                {**error, "loc": ("body", number, *error["loc"])}
+                for error in e.errors()
+            )
+    if errors:
+        raise RequestValidationError(errors)
+
+    return api_data_to_frame(rows)
+
+
+def columns_to_frame(body: bytes) -> pd.DataFrame:
+    """Build a DataFrame from a columnar JSON payload
+
+    Parameters
+    ----------
+    body : bytes
+        JSON object mapping column names to lists of values, such as
+        `{"x": [1, 2], "y": [3, 4]}`, or the output of
+        `DataFrame.to_json(orient="split")`.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    try:
+        payload = json.loads(body)
+        if payload.keys() in ({"columns", "data"}, {"columns", "data", "index"}):
+            frame = pd.DataFrame(payload["data"], columns=payload["columns"])
+        else:
+            frame = pd.DataFrame(payload)
+    except (ValueError, TypeError) as e:
+        # scalar values, ragged columns or invalid JSON
+        raise RequestValidationError(
+            [{"type": "columns_invalid", "loc": ("body",), "msg": str(e)}]
+        )
+
+    return frame
+
+
+def parse_json(body: bytes):
+    """Parse a JSON body, rejecting invalid JSON as FastAPI would"""
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body", 0), "msg": str(e)}]
+        )
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+# a literal, number or escape that is cut short, such as `-Infinit`, fails to
+# decode at most this many characters before the end of the text
+_TOKEN_TAIL = len("-Infinity")
+
+
+def _incomplete(error: json.JSONDecodeError) -> bool:
+    """Check if more input could fix a decode error, rather than it being invalid"""
+    if error.msg.startswith("Unterminated string"):
+        # reported at the start of the string, which runs to the end of the text
+        return True
+    return len(error.doc) - error.pos <= _TOKEN_TAIL
+
+
+def _invalid_json(msg: str, row: int) -> RequestValidationError:
+    return RequestValidationError(
+        [{"type": "json_invalid", "loc": ("body", row), "msg": msg}]
+    )
+
+
+class RecordStream:
+    """Parse a JSON array of records incrementally, validating as it goes
+
+    Bytes are fed in as they arrive. Each complete record is parsed as soon as
+    its closing brace is read, and every `chunk_rows` records are framed and
+    checked against the prototype. Only the validated, typed columns are kept,
+    so neither the whole body nor a list of every record is ever held in
+    memory, and invalid input is rejected without reading the rest of it.
+
+    Parameters
+    ----------
+    validator : PrototypeValidator
+        Compiled prototype the records are checked against
+    chunk_rows : int
+        Number of records framed and validated at a time
+
+    Attributes
+    ----------
+    rows : int
+        Number of records parsed so far
+    validate_seconds : float
+        Time spent validating, included in the time spent feeding
+    """
+
+    def __init__(self, validator, chunk_rows: int = 1000):
+        self.validator = validator
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self.validate_seconds = 0.0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._text = ""
+        # "start", "first", "record", "separator" or "end"
+        self._state = "start"
+        self._records = []
+        self._frames = []
+
+    def feed(self, data: bytes):
+        """Parse the next piece of the body"""
+        try:
+            self._text += self._decoder.decode(data)
+        except UnicodeDecodeError as e:
+            raise _invalid_json(str(e), self.rows)
+        self._parse(final=False)
+
+    def close(self) -> pd.DataFrame:
+        """Finish parsing, returning every validated record in one DataFrame"""
+        self.feed(b"")
+        self._parse(final=True)
+        if self._state != "end":
+            raise _invalid_json("Unexpected end of JSON array", self.rows)
+        self._validate()
+        if not self._frames:
+            return self.validator.empty()
+        return pd.concat(self._frames, ignore_index=True)
+
+    def _parse(self, final: bool):
+        text = self._text
+        pos = 0
+        # records are parsed in bulk at most once per piece, since a run that
+        # does not parse is tried again from every later record otherwise
+        bulk = True
+        while True:
+            pos = _WHITESPACE.match(text, pos).end()
+            if pos == len(text):
+                break
+            char = text[pos]
+            if self._state == "start":
+                if char != "[":
+                    raise RequestValidationError(
+                        [
+                            {
+                                "type": "list_type",
+                                "loc": ("body",),
+                                "msg": "Input should be a list of records",
+                            }
+                        ]
+                    )
+                pos += 1
+                self._state = "first"
+            elif self._state == "separator" or (self._state == "first" and char == "]"):
+                if char == "]":
+                    self._state = "end"
+                elif char == ",":
+                    self._state = "record"
+                else:
+                    raise _invalid_json("Expecting ',' delimiter", self.rows)
+                pos += 1
+            elif self._state == "end":
+                raise _invalid_json("Extra data after JSON array", self.rows)
+            elif char == "]":
+                raise _invalid_json("Expecting value after ','", self.rows)
+            elif char != "{":
+                raise RequestValidationError(
+                    [
+                        {
+                            "type": "dict_type",
+                            "loc": ("body", self.rows),
+                            "msg": "Input should be a valid dictionary",
+                        }
+                    ]
+                )
+            elif bulk and self._parse_run(text, pos):
+                bulk = False
+                pos = text.rfind("}") + 1
+            else:
+                bulk = False
+                try:
+                    record, pos = _DECODER.raw_decode(text, pos)
+                except json.JSONDecodeError as e:
+                    if final or not _incomplete(e):
+                        raise _invalid_json(e.msg, self.rows)
+                    # the record is not complete yet, wait for more bytes
+                    break
+                self._records.append(record)
+                self.rows += 1
+                self._state = "separator"
+                if len(self._records) >= self.chunk_rows:
+                    self._validate()
+        self._text = text[pos:]
+
+    def _parse_run(self, text: str, pos: int) -> bool:
+        # parse every complete record buffered so far in one call. A prefix
+        # that parses must end between records, since a brace inside a string
+        # or a nested object leaves it unterminated
+        end = text.rfind("}") + 1
+        if end <= pos:
+            return False
+        try:
+            records = json.loads(f"[{text[pos:end]}]")
+        except ValueError:
+            return False
+        if not all(isinstance(record, dict) for record in records):
+            # parsed record by record instead, to report where
+            return False
+        while records:
+            room = self.chunk_rows - len(self._records)
+            self._records.extend(records[:room])
+            self.rows += len(records[:room])
+            records = records[room:]
+            if len(self._records) >= self.chunk_rows:
+                self._validate()
+        self._state = "separator"
+        return True
+
+    def _validate(self):
+        if not self._records:
+            return
+        start = perf_counter()
+        first = self.rows - len(self._records)
+        frame = pd.DataFrame(self._records, index=range(first, self.rows))
+        self._records = []
+        # row numbers in errors count from the start of the array
+        self._frames.append(validate(frame, self.validator))
+        self.validate_seconds += perf_counter() - start
+
+
+async def iter_ndjson(stream, chunk_rows: int):
+    """Parse newline-delimited JSON from a byte stream, in chunks of rows
+
+    Parameters
+    ----------
+    stream :
+        Async iterator of bytes, such as `Request.stream()`
+    chunk_rows : int
+        Number of rows in each chunk, except possibly the last one
+
+    Yields
+    ------
+    tuple
+        Row number of the first row in the chunk, and a list of parsed rows
+    """
+    # pieces of a line that has not ended yet, joined once it does
+    partial = []
+    rows = []
+    start = 0
+
+    def parse(line: bytes):
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise RequestValidationError(
+                [
+                    {
+                        "type": "json_invalid",
+                        "loc": ("body", start + len(rows)),
+                        "msg": str(e),
+                    }
+                ]
+            )
+
+    async for piece in stream:
+        if b"\n" not in piece:
+            partial.append(piece)
+            continue
+        first, *lines, last = piece.split(b"\n")
+        partial.append(first)
+        lines.insert(0, b"".join(partial))
+        partial = [last]
+        for line in lines:
+            if line.strip():
+                rows.append(parse(line))
+            if len(rows) >= chunk_rows:
+                yield start, rows
+                start += len(rows)
+                rows = []
+
+    buffer = b"".join(partial)
+    if buffer.strip():
+        rows.append(parse(buffer))
+    if rows:
+        yield start, rows
+
+
+def to_ndjson(output, endpoint_name: str) -> bytes:
+    """Write endpoint output as newline-delimited JSON
+
+    Row-wise output (lists, arrays and Series) becomes one line per row, and
+    DataFrames one record per row. Anything else is written as a single line.
+    """
+    if isinstance(output, pd.DataFrame):
+        lines = [dumps(row) for row in output.to_dict(orient="records")]
+    elif isinstance(output, (list, np.ndarray, pd.Series)):
+        if isinstance(output, pd.Series):
+            output = output.tolist()
+        lines = [dumps({endpoint_name: row}) for row in _widen(output)]
+    else:
+        lines = [dumps(output)]
+
+    return b"".join(line + b"\n" for line in lines)
+
+
+def to_arrow(data, endpoint_name: str) -> bytes:
+    """Write endpoint output as an Arrow IPC stream
+
+    Parameters
+    ----------
+    data :
+        Output of an endpoint function. DataFrames and dicts are written as
+        columns, other sequences become a single column named `endpoint_name`.
+    endpoint_name : str
+        Name of the endpoint
+
+    Returns
+    -------
+    bytes
+        Arrow IPC stream
+    """
+    if not arrow_exists:
+        raise ImportError("Cannot import `pyarrow`.")
+
+    if isinstance(data, pd.DataFrame):
+        table = pyarrow.Table.from_pandas(data, preserve_index=False)
+    elif isinstance(data, dict):
+        table = pyarrow.table(data)
+    else:
+        if isinstance(data, pd.Series):
+            data = data.to_numpy()
+        if not (isinstance(data, np.ndarray) and data.ndim == 1):
+            # rows of a 2-d array, or other sequences, become list values
+            data = list(data)
+        table = pyarrow.table({endpoint_name: pyarrow.array(data)})
+
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
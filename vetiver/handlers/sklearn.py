@@ -32,6 +32,8 @@ class SKLearnHandler(BaseHandler):
         prediction_type: str
             Type of prediction to make. One of "predict", "predict_proba",
             or "predict_log_proba". Default is "predict".
+        as_array: bool
+            Return the model's NumPy output rather than a list. Default is False.
 
         Returns
         -------
@@ -46,4 +48,6 @@ class SKLearnHandler(BaseHandler):
             else input_data
         )
 
-        return getattr(self.model, prediction_type)(input_data).tolist()
+        prediction = getattr(self.model, prediction_type)(input_data)
+
+        return prediction if kw.get("as_array") else prediction.tolist()
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 from .base import BaseHandler
@@ -34,6 +35,8 @@ class StatsmodelsHandler(BaseHandler):
         ----------
         input_data:
             Test data
+        as_array: bool
+            Return a NumPy array rather than a list. Default is False.
 
         Returns
         -------
@@ -46,4 +49,6 @@ class StatsmodelsHandler(BaseHandler):
         input_data = (
             input_data if isinstance(input_data, (list, pd.DataFrame)) else [input_data]
         )
-        return self.model.predict(input_data).tolist()
+        prediction = self.model.predict(input_data)
+
+        return np.asarray(prediction) if kw.get("as_array") else prediction.tolist()
@@ -34,6 +34,8 @@ class TorchHandler(BaseHandler):
         ----------
         input_data:
             Test data
+        as_array: bool
+            Return a NumPy array rather than a list. Default is False.
 
         Returns
         -------
@@ -50,4 +52,6 @@ class TorchHandler(BaseHandler):
             input_data = torch.tensor(input_data)
             prediction = self.model(input_data)
 
+        if kw.get("as_array"):
+            return prediction.detach().cpu().numpy()
         return prediction.tolist()
@@ -34,6 +34,8 @@ class XGBoostHandler(BaseHandler):
         ----------
         input_data:
             Test data
+        as_array: bool
+            Return the model's NumPy output rather than a list. Default is False.
 
         Returns
         -------
@@ -54,4 +56,4 @@ class XGBoostHandler(BaseHandler):
 
         prediction = self.model.predict(input_data)
 
-        return prediction.tolist()
+        return prediction if kw.get("as_array") else prediction.tolist()
@@ -0,0 +1,85 @@
+from fastapi import HTTPException
+
+
+class BodyTooLarge(HTTPException):
+    """Request body is larger than the server accepts"""
+
+    def __init__(self, max_size: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Request body is larger than the limit of {max_size} bytes",
+        )
+
+
+class BodySizeLimitMiddleware:
+    """ASGI middleware that rejects request bodies over a size limit
+
+    Requests that declare a larger `Content-Length` are rejected with a 413
+    status before any of the body is read. For other requests, the bytes are
+    counted as the app reads them, and reading stops with a 413 status once
+    the limit is passed, so an oversized body is never buffered in full.
+
+    Parameters
+    ----------
+    app :
+        ASGI application
+    max_size : int
+        Largest request body accepted, in bytes
+    """
+
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        try:
+            declared = int(content_length) if content_length else None
+        except ValueError:
+            declared = None
+        if declared is not None and declared > self.max_size:
+            return await self._reject(send, BodyTooLarge(self.max_size))
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise BodyTooLarge(self.max_size)
+            return message
+
+        async def tracked_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except BodyTooLarge as e:
+            # raised outside a route, such as while decompressing the body
+            if started:
+                raise
+            await self._reject(send, e)
+
+    async def _reject(self, send, exc: BodyTooLarge):
+        body = exc.detail.encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": exc.status_code,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,180 @@
+from bisect import bisect_left
+
+STAGES = ("parse", "validate", "frame", "predict", "serialize")
+
+# upper bounds in seconds, from half a millisecond to ten seconds
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Latency histogram with a fixed set of buckets
+
+    Bucket counts are kept in a list allocated up front, so observing a value
+    is a binary search and an increment, without allocating.
+
+    Parameters
+    ----------
+    bounds : tuple
+        Sorted upper bounds of the buckets, in seconds. Values above the last
+        bound are counted in an extra `+Inf` bucket.
+    """
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        # buckets are inclusive of their upper bound
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class EndpointMetrics:
+    """Latency histograms and counters for one endpoint
+
+    Attributes
+    ----------
+    stages : dict
+        Histogram of time spent in each of `STAGES`
+    requests : int
+        Number of requests received
+    errors : int
+        Number of requests that raised an error, including invalid input
+    timeouts : int
+        Number of requests cancelled at their deadline
+    disconnects : int
+        Number of requests cancelled because the client disconnected
+    rows : int
+        Number of rows scored
+    in_flight : int
+        Number of requests currently being handled
+    """
+
+    __slots__ = (
+        "stages",
+        "requests",
+        "errors",
+        "timeouts",
+        "disconnects",
+        "rows",
+        "in_flight",
+    )
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.stages = {stage: Histogram(buckets) for stage in STAGES}
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.disconnects = 0
+        self.rows = 0
+        self.in_flight = 0
+
+
+class Metrics:
+    """Per-endpoint metrics, rendered in Prometheus text exposition format
+
+    Parameters
+    ----------
+    buckets : tuple
+        Upper bounds in seconds of the latency histogram buckets.
+
+    Examples
+    --------
+    ```{python}
+    from vetiver.metrics import Metrics
+    metrics = Metrics()
+    stats = metrics.endpoint("predict")
+    stats.stages["predict"].observe(0.002)
+    stats.rows += 10
+    print(metrics.render())
+    ```
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._endpoints = {}
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        """Get the metrics for an endpoint, creating them on first use"""
+        stats = self._endpoints.get(name)
+        if stats is None:
+            stats = self._endpoints[name] = EndpointMetrics(self.buckets)
+        return stats
+
+    def render(self) -> str:
+        """Format all metrics in Prometheus text exposition format"""
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        lines = [
+            "# HELP vetiver_stage_duration_seconds Time spent in each request stage.",
+            "# TYPE vetiver_stage_duration_seconds histogram",
+        ]
+        for name, stats in self._endpoints.items():
+            for stage, histogram in stats.stages.items():
+                labels = f'endpoint="{_escape(name)}",stage="{stage}"'
+                total = 0
+                for le, count in zip(bounds, histogram.counts):
+                    total += count
+                    lines.append(
+                        f'vetiver_stage_duration_seconds_bucket{{{labels},le="{le}"}} '
+                        f"{total}"
+                    )
+                lines.append(
+                    f"vetiver_stage_duration_seconds_sum{{{labels}}} "
+                    f"{_format_value(histogram.sum)}"
+                )
+                lines.append(
+                    f"vetiver_stage_duration_seconds_count{{{labels}}} {total}"
+                )
+
+        for attribute, metric, kind, help_text in (
+            ("requests", "vetiver_requests_total", "counter", "Requests received."),
+            ("errors", "vetiver_errors_total", "counter", "Requests that failed."),
+            ("timeouts", "vetiver_timeouts_total", "counter", "Requests timed out."),
+            (
+                "disconnects",
+                "vetiver_disconnects_total",
+                "counter",
+                "Requests cancelled by the client disconnecting.",
+            ),
+            ("rows", "vetiver_rows_total", "counter", "Rows scored."),
+            ("in_flight", "vetiver_requests_in_flight", "gauge", "Requests running."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, stats in self._endpoints.items():
+                value = getattr(stats, attribute)
+                lines.append(f'{metric}{{endpoint="{_escape(name)}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
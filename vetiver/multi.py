@@ -0,0 +1,226 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from functools import partial
+from time import monotonic
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match, Mount
+
+from .batching import SingleFlight
+from .server import VetiverAPI
+from .vetiver_model import VetiverModel
+
+
+class VetiverMultiAPI:
+    """Serve many pinned models from one app, loading them on first use
+
+    Each model gets its own `VetiverAPI` mounted under `/{model_name}`, with its
+    own `/predict`, `/metadata`, `/prototype` and `/ping` routes and prototype
+    validation. A model is read from the board on its first request. Once the
+    loaded models exceed `memory_budget`, the least recently used ones are
+    dropped, to be loaded again when they are next requested.
+
+    Parameters
+    ----------
+    board :
+        `pins` board the models are read from
+    model_names : list
+        Names of the pins that can be served. Defaults to every pin on the board.
+    memory_budget : int
+        Maximum estimated size in bytes of the loaded models. A model's size is
+        estimated from the size of its pinned file. Loaded models are not
+        limited if None.
+    list_interval : float
+        Seconds the board's list of pins is reused for before it is read again,
+        when `model_names` is not given.
+    app_factory :
+        Type of API to be deployed
+    **kw : dict
+        Passed to each model's `VetiverAPI`, such as `check_prototype` or
+        `executor`.
+
+    Examples
+    -------
+    ```python
+    import pins
+    from vetiver import VetiverMultiAPI
+    board = pins.board_folder("models", allow_pickle_read=True)
+
+    api = VetiverMultiAPI(board, memory_budget=2 * 1024**3)
+    api.run()
+    ```
+
+    Notes
+    -----
+    The app has a `/ping` route of its own, and `/models`, which lists the
+    available and currently loaded models.
+
+    ```
+    ├──/ping (GET)
+    ├──/models (GET)
+    └──/{model_name}
+        ├──/ping (GET)
+        ├──/metadata (GET)
+        ├──/prototype (GET)
+        └──/predict (POST)
+    ```
+    """
+
+    def __init__(
+        self,
+        board,
+        model_names: list = None,
+        memory_budget: int = None,
+        list_interval: float = 60.0,
+        app_factory=FastAPI,
+        **kw,
+    ):
+        self.board = board
+        self.model_names = model_names
+        self.memory_budget = memory_budget
+        self.list_interval = list_interval
+        self._pin_list = None
+        self._listed_at = None
+        self.app_factory = app_factory
+        self.api_kwargs = kw
+        # loaded models and their mounts, least recently used first
+        self._loaded = OrderedDict()
+        self._sizes = {}
+        self._loading = SingleFlight()
+        self.app = self._init_app()
+
+    def _init_app(self):
+        app = self.app_factory()
+
+        @app.get("/ping")
+        async def ping():
+            """Ping endpoint for health check"""
+            return {"ping": "pong"}
+
+        @app.get("/models")
+        async def models():
+            """Available models, and those currently loaded"""
+            return {
+                "available": await self._available(),
+                "loaded": list(self._loaded),
+            }
+
+        app.mount("/", self._dispatch)
+
+        return app
+
+    def available(self) -> list:
+        """Names of the models that can be served"""
+        if self.model_names is not None:
+            return list(self.model_names)
+        return self.board.pin_list()
+
+    async def _available(self) -> list:
+        """Names of the models that can be served, listed at most once every
+        `list_interval` seconds
+        """
+        if self.model_names is not None:
+            return list(self.model_names)
+        if self._pin_list is None or monotonic() - self._listed_at > self.list_interval:
+            # listing a remote board is network I/O, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            self._pin_list = await self._loading.do(
+                ("pin_list",), partial(loop.run_in_executor, None, self.available)
+            )
+            self._listed_at = monotonic()
+        return self._pin_list
+
+    @property
+    def memory_used(self) -> int:
+        """Estimated size in bytes of the loaded models"""
+        return sum(self._sizes[name] for name in self._loaded)
+
+    async def get_api(self, model_name: str) -> VetiverAPI:
+        """Get the API for a model, loading it if needed"""
+        api, _ = await self._get_mount(model_name)
+        return api
+
+    async def _get_mount(self, model_name: str):
+        loaded = self._loaded.get(model_name)
+        if loaded is None:
+            loaded = await self._loading.do(model_name, partial(self._load, model_name))
+        else:
+            self._loaded.move_to_end(model_name)
+        return loaded
+
+    async def _load(self, model_name: str):
+        loop = asyncio.get_running_loop()
+        # reading pins and unpickling models must not block other requests
+        api, size = await loop.run_in_executor(None, self._build, model_name)
+
+        self._evict(size)
+        loaded = self._loaded[model_name] = (api, Mount(f"/{model_name}", app=api.app))
+        self._sizes[model_name] = size
+        logging.getLogger("uvicorn.error").info(
+            f"Loaded model {model_name}, {self.memory_used} bytes in use"
+        )
+        return loaded
+
+    def _build(self, model_name: str):
+        model = VetiverModel.from_pin(self.board, model_name)
+        api = VetiverAPI(model, app_factory=self.app_factory, **self.api_kwargs)
+        if api.warmup:
+            api._warm_up_model(model)
+            # the mounted app's startup event, which would warm it up, never runs
+            api.ready = True
+        size = self.board.pin_meta(model_name).file_size
+        return api, size
+
+    def _evict(self, size: int):
+        """Drop least recently used models until `size` more bytes fit"""
+        if self.memory_budget is None:
+            return
+        while self._loaded and self.memory_used + size > self.memory_budget:
+            model_name, (api, _) = self._loaded.popitem(last=False)
+            # requests already running keep their reference to the API
+            api._shutdown_pool()
+            logging.getLogger("uvicorn.error").info(f"Unloaded model {model_name}")
+
+    async def _dispatch(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return
+
+        path = scope["path"].removeprefix(scope.get("root_path", "")).lstrip("/")
+        # names of pins on Posit Connect contain a slash, such as "user/model"
+        model_name = _match_name(path, [*self._loaded, *await self._available()])
+        if model_name is None:
+            return await self._not_found(scope, receive, send)
+
+        _, mount = await self._get_mount(model_name)
+        match, child_scope = mount.matches(scope)
+        if match != Match.FULL:
+            return await self._not_found(scope, receive, send)
+        scope.update(child_scope)
+        await mount.handle(scope, receive, send)
+
+    async def _not_found(self, scope, receive, send):
+        if scope["type"] == "http":
+            response = PlainTextResponse("Not Found", status_code=404)
+            await response(scope, receive, send)
+
+    def run(self, port: int = 8000, host: str = "127.0.0.1", **kw):
+        """
+        Start API
+
+        Parameters
+        ----------
+        port : int
+            An integer that indicates the server port that should be listened on.
+        host : str
+            A valid IPv4 or IPv6 address, which the application will listen on.
+        """
+        uvicorn.run(self.app, port=port, host=host, **kw)
+
+
+def _match_name(path: str, names) -> str:
+    """The longest of `names` that `path` is under, or None"""
+    matches = [name for name in names if path == name or path.startswith(f"{name}/")]
+    return max(matches, key=len, default=None)
@@ -0,0 +1,210 @@
+import gc
+import logging
+import os
+import signal
+import stat
+import time
+from collections import deque
+from warnings import warn
+
+import uvicorn
+
+threadpoolctl_exists = True
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpoolctl_exists = False
+
+# read by BLAS and OpenMP runtimes when they start
+THREAD_LIMIT_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+# exit code of a worker whose server failed to start, the same as uvicorn's
+STARTUP_FAILURE = 3
+
+
+def cpu_count() -> int:
+    """Number of CPUs this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def limit_threads(threads: int):
+    """Limit the threads used by BLAS and OpenMP in this process
+
+    Environment variables cover runtimes that have not started yet, and
+    `threadpoolctl`, when installed, resizes the ones that already have. Returns
+    the `threadpoolctl` limiter, which can restore the original limits, or None.
+    """
+    for name in THREAD_LIMIT_VARS:
+        os.environ[name] = str(threads)
+    if threadpoolctl_exists:
+        return threadpool_limits(threads)
+    return None
+
+
+def serve_prefork(
+    app,
+    workers: int = None,
+    threads_per_worker: int = None,
+    max_restarts: int = 5,
+    restart_window: float = 60.0,
+    **kw,
+):
+    """Serve an app from several forked processes that share its memory
+
+    The socket is bound and the app loaded in the parent process, which then
+    forks the workers. Objects created before the fork, such as a large model,
+    are shared copy-on-write instead of being loaded once per worker, and
+    `gc.freeze()` keeps the garbage collector from writing to, and so copying,
+    their pages. Each worker runs its own event loop and startup events. Workers
+    that exit unexpectedly are restarted, after a delay that doubles with each
+    recent restart, and SIGINT or SIGTERM stops them all.
+
+    All workers are stopped and a RuntimeError is raised if a worker fails
+    during startup, or workers exit more than `max_restarts` times within
+    `restart_window` seconds.
+
+    Parameters
+    ----------
+    app :
+        ASGI application
+    workers : int
+        Number of worker processes. Defaults to the number of CPUs.
+    threads_per_worker : int
+        BLAS and OpenMP threads for each worker. Defaults to the number of CPUs
+        divided by `workers`, and at least 1. Threads already started in this
+        process can only be limited when `threadpoolctl` is installed.
+    max_restarts : int
+        Most worker restarts allowed within `restart_window` seconds.
+    restart_window : float
+        Seconds over which worker restarts are counted.
+    **kw : dict
+        Passed to `uvicorn.Config`, such as `host` and `port`.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Running with workers requires a platform with os.fork.")
+
+    workers = workers or cpu_count()
+    threads_per_worker = threads_per_worker or max(1, cpu_count() // workers)
+    logger = logging.getLogger("uvicorn.error")
+    if not threadpoolctl_exists:
+        warn(
+            "threadpoolctl is not installed, so BLAS and OpenMP libraries that "
+            "are already loaded keep their default number of threads. Install "
+            "it with `pip install vetiver[threadpoolctl]`."
+        )
+
+    config = uvicorn.Config(app, **kw)
+    config.load()
+    if config.uds is not None:
+        _remove_socket(config.uds)
+    sock = config.bind_socket()
+
+    # move everything allocated so far out of the collector's reach
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+    failure = None
+    restarts = deque()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 0
+            try:
+                limit_threads(threads_per_worker)
+                server = uvicorn.Server(config)
+                server.run(sockets=[sock])
+                if not server.started:
+                    code = STARTUP_FAILURE
+            except SystemExit as e:
+                # uvicorn exits with STARTUP_FAILURE when startup fails
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception("Worker failed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = True
+        logger.info(f"Started worker process [{pid}]")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    previous = {
+        signum: signal.signal(signum, stop)
+        for signum in (signal.SIGINT, signal.SIGTERM)
+    }
+    try:
+        for _ in range(workers):
+            spawn()
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            children.pop(pid, None)
+            if stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            now = time.monotonic()
+            restarts.append(now)
+            while now - restarts[0] > restart_window:
+                restarts.popleft()
+            if code == STARTUP_FAILURE:
+                failure = f"Worker process [{pid}] failed to start"
+            elif len(restarts) > max_restarts:
+                failure = (
+                    f"Workers exited {len(restarts)} times in "
+                    f"{restart_window} seconds"
+                )
+            if failure is not None:
+                logger.error(f"{failure}, stopping")
+                stop(None, None)
+                continue
+
+            delay = min(0.1 * 2 ** (len(restarts) - 1), 10.0)
+            logger.warning(
+                f"Worker process [{pid}] exited with code {code}, "
+                f"restarting in {delay:.1f}s"
+            )
+            time.sleep(delay)
+            if not stopping:
+                spawn()
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        sock.close()
+        if config.uds is not None:
+            _remove_socket(config.uds)
+        gc.unfreeze()
+
+    if failure is not None:
+        raise RuntimeError(failure)
+
+
+def _remove_socket(path: str):
+    # a socket file left behind by a server that stopped would block binding
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -1,10 +1,15 @@
-from functools import singledispatch
+import dataclasses
+from functools import lru_cache, singledispatch
+from typing import Union, get_args, get_origin
 
 try:
-    from types import NoneType
+    from types import NoneType, UnionType
+
+    _UNION_TYPES = (Union, UnionType)
 except ImportError:
     # python < 3.10
     NoneType = type(None)
+    _UNION_TYPES = (Union,)
 
 import pandas as pd
 import numpy as np
@@ -244,3 +249,372 @@ def _to_field(data):
     for key, value in data.items():
         basemodel_input[key] = (type(value), Field(..., example=value))
     return basemodel_input
+
+
+class PrototypeValidationError(ValueError):
+    """
+    Throw an error if a batch of data does not match its data prototype
+    """
+
+    def __init__(self, errors: list):
+        self._errors = errors
+        super().__init__(errors)
+
+    def errors(self) -> list:
+        """Validation errors, in the same layout as pydantic errors"""
+        return self._errors
+
+
+_BOUNDS = ("gt", "ge", "lt", "le", "multiple_of", "min_length", "max_length")
+
+
+def _unwrap_optional(annotation):
+    """Return the non-None type of Optional[X], and if None is allowed"""
+    if get_origin(annotation) in _UNION_TYPES:
+        args = [arg for arg in get_args(annotation) if arg is not NoneType]
+        nullable = len(args) < len(get_args(annotation))
+        return (args[0] if len(args) == 1 else annotation), nullable
+    return annotation, False
+
+
+def _constraints(metadata: list):
+    """Collect numeric and length bounds from pydantic field metadata
+
+    Returns the bounds, and if every constraint in `metadata` was understood.
+    """
+    bounds = {}
+    known = True
+    for item in metadata:
+        if item is None:
+            continue
+        if not dataclasses.is_dataclass(item):
+            known = False
+            continue
+        for f in dataclasses.fields(item):
+            value = getattr(item, f.name)
+            if value is None:
+                continue
+            if f.name in _BOUNDS:
+                bounds[f.name] = value
+            else:
+                # eg. patterns, strict mode or string transformations
+                known = False
+    return bounds, known
+
+
+@dataclasses.dataclass
+class _Column:
+    name: str
+    type: type
+    required: bool
+    default: object
+    nullable: bool
+    bounds: dict
+
+
+class PrototypeValidator:
+    """Validate a whole batch of data against a data prototype at once
+
+    The prototype's fields are compiled once into a list of column checks that
+    run as pandas/NumPy operations over each column: required columns, dtype
+    coercion, missing values, and numeric or length bounds. The output columns
+    are in prototype order, and columns not in the prototype are dropped.
+
+    Parameters
+    ----------
+    prototype : vetiver.Prototype
+        Data prototype
+    nan_policy : str
+        What to do with missing values (None or NaN) in fields that are not
+        Optional. One of "raise" or "allow".
+
+    Attributes
+    ----------
+    columns : list
+        Column names, in prototype order
+    exact : bool
+        True if the validator enforces every rule of the pydantic prototype, so
+        it can be used in place of per-row pydantic validation. Values that
+        fail the column checks are passed to pydantic one at a time, so input
+        accepted by pydantic's lax mode, such as numeric strings, is coerced
+        the same way.
+
+    Examples
+    -------
+    ```{python}
+    import pandas as pd
+    from vetiver.prototype import vetiver_create_prototype, PrototypeValidator
+    df = pd.DataFrame({'x': [1, 2, 3], 'y': [4.0, 5.0, 6.0]})
+    validator = PrototypeValidator(vetiver_create_prototype(df))
+    validator(pd.DataFrame({'y': [1, 2], 'x': [1.0, 2.0]})).dtypes
+    ```
+    """
+
+    def __init__(self, prototype, nan_policy: str = "raise"):
+        if nan_policy not in ("raise", "allow"):
+            raise ValueError("nan_policy must be one of 'raise' or 'allow'")
+
+        self.nan_policy = nan_policy
+        self._plan = []
+        self.exact = True
+
+        if hasattr(prototype, "model_fields"):
+            decorators = prototype.__pydantic_decorators__
+            self.exact = not any(
+                [
+                    decorators.validators,
+                    decorators.field_validators,
+                    decorators.root_validators,
+                    decorators.model_validators,
+                ]
+            )
+            for name, field in prototype.model_fields.items():
+                python_type, nullable = _unwrap_optional(field.annotation)
+                bounds, known = _constraints(field.metadata)
+                self._add(
+                    _Column(
+                        name,
+                        python_type,
+                        field.is_required(),
+                        field.default,
+                        nullable,
+                        bounds,
+                    )
+                )
+                self.exact &= known and field.alias in (None, name)
+        else:
+            # pydantic v1
+            self.exact = not (
+                prototype.__pre_root_validators__ or prototype.__post_root_validators__
+            )
+            for name, field in prototype.__fields__.items():
+                bounds = {
+                    key: getattr(field.type_, key)
+                    for key in _BOUNDS
+                    if getattr(field.type_, key, None) is not None
+                }
+                self._add(
+                    _Column(
+                        name,
+                        field.type_,
+                        bool(field.required),
+                        field.default,
+                        field.allow_none,
+                        bounds,
+                    )
+                )
+                self.exact &= (
+                    not field.class_validators
+                    and field.alias == name
+                    and getattr(field.type_, "regex", None) is None
+                )
+
+        self.columns = [column.name for column in self._plan]
+
+    def _add(self, column: _Column):
+        if isinstance(column.type, type) and issubclass(column.type, np.generic):
+            # numpy scalar types, such as np.int64
+            column.type = type(column.type(0).item())
+        if not (
+            isinstance(column.type, type) and issubclass(column.type, _COERCE_TYPES)
+        ):
+            self.exact = False
+        self._plan.append(column)
+
+    def __call__(self, data) -> pd.DataFrame:
+        """Validate and coerce a batch of data
+
+        Parameters
+        ----------
+        data : pd.DataFrame or np.ndarray
+            Batch to validate. 2-dimensional arrays must have one column per
+            prototype field, in prototype order.
+
+        Returns
+        -------
+        pd.DataFrame
+            Validated data, with columns in prototype order
+
+        Raises
+        ------
+        PrototypeValidationError
+            If any column does not match the prototype
+        """
+        if isinstance(data, np.ndarray):
+            if data.ndim != 2 or data.shape[1] != len(self.columns):
+                raise PrototypeValidationError(
+                    [
+                        {
+                            "type": "shape",
+                            "loc": ("body",),
+                            "msg": f"Expected an array of shape (n, "
+                            f"{len(self.columns)}), got {data.shape}",
+                        }
+                    ]
+                )
+            data = pd.DataFrame(data, columns=self.columns)
+
+        errors = []
+        columns = {}
+        for column in self._plan:
+            if column.name not in data.columns:
+                if column.required:
+                    errors.append(
+                        {
+                            "type": "missing",
+                            "loc": ("body", column.name),
+                            "msg": "Field required",
+                        }
+                    )
+                else:
+                    columns[column.name] = pd.Series(
+                        [column.default] * len(data), index=data.index
+                    )
+                continue
+
+            values, error = self._check(column, data[column.name])
+            if error is not None:
+                errors.append(error)
+            columns[column.name] = values
+
+        if errors:
+            raise PrototypeValidationError(errors)
+
+        return pd.DataFrame(columns, index=data.index)
+
+    def empty(self) -> pd.DataFrame:
+        """A batch with no rows, with the prototype's columns and dtypes"""
+        return pd.DataFrame(
+            {
+                column.name: pd.Series(dtype=_DTYPES.get(column.type, "object"))
+                for column in self._plan
+            }
+        )
+
+    def _check(self, column: _Column, values: pd.Series):
+        missing = values.isna()
+        has_missing = missing.any()
+        if has_missing and not column.nullable and self.nan_policy == "raise":
+            return values, _row_error(
+                column.name, missing, "missing", "Input should not be missing"
+            )
+
+        python_type = column.type
+        if isinstance(python_type, type) and issubclass(python_type, _COERCE_TYPES):
+            values, valid = _coerce(values, python_type, missing, has_missing)
+            if not valid.all():
+                return values, _row_error(
+                    column.name,
+                    ~valid,
+                    "type",
+                    f"Input should be a valid {python_type.__name__}",
+                )
+
+        for bound, limit in column.bounds.items():
+            ok = _BOUND_CHECKS[bound](values, limit) | missing
+            if not ok.all():
+                return values, _row_error(
+                    column.name,
+                    ~ok,
+                    bound,
+                    f"Input should satisfy {bound}={limit}",
+                )
+
+        return values, None
+
+
+# bool before int, since bool is a subclass of int
+_COERCE_TYPES = (bool, int, float, str)
+
+_BOUND_CHECKS = {
+    "gt": lambda values, limit: values > limit,
+    "ge": lambda values, limit: values >= limit,
+    "lt": lambda values, limit: values < limit,
+    "le": lambda values, limit: values <= limit,
+    "multiple_of": lambda values, limit: values % limit == 0,
+    "min_length": lambda values, limit: values.str.len() >= limit,
+    "max_length": lambda values, limit: values.str.len() <= limit,
+}
+
+
+def _coerce(values: pd.Series, python_type: type, missing, has_missing: bool):
+    """Coerce a column to a prototype field type
+
+    Returns the coerced column, and a boolean mask of valid rows.
+    """
+    kind = values.dtype.kind
+    valid = pd.Series(True, index=values.index)
+
+    if issubclass(python_type, bool):
+        if kind != "b":
+            valid = values.map(lambda value: isinstance(value, bool)) | missing
+            if valid.all() and not has_missing:
+                values = values.astype("bool")
+    elif issubclass(python_type, int):
+        if kind == "f":
+            valid = (values % 1 == 0) | missing
+            if valid.all() and not has_missing:
+                # JSON numbers such as 1.0 are valid integers
+                values = values.astype("int64")
+        elif kind not in "iu":
+            valid = values.map(_is_int) | missing
+    elif issubclass(python_type, float):
+        if kind in "iu":
+            values = values.astype("float64")
+        elif kind != "f":
+            valid = values.map(_is_number) | missing
+    elif issubclass(python_type, str):
+        if kind != "O" or pd.api.types.infer_dtype(values, skipna=True) != "string":
+            valid = values.map(lambda value: isinstance(value, str)) | missing
+
+    if not valid.all():
+        # pydantic's lax mode also accepts, eg, numeric strings and bools as
+        # numbers, so give the rows that failed the fast checks to pydantic
+        values, valid = _coerce_lax(values, python_type, valid)
+        dtype = _DTYPES.get(python_type)
+        if valid.all() and not has_missing and dtype is not None:
+            try:
+                values = values.astype(dtype)
+            except OverflowError:
+                pass
+
+    return values, valid
+
+
+_DTYPES = {bool: "bool", int: "int64", float: "float64"}
+
+
+@lru_cache
+def _lax_validator(python_type: type):
+    if hasattr(pydantic, "TypeAdapter"):
+        return pydantic.TypeAdapter(python_type).validate_python
+    # pydantic v1
+    return lambda value: pydantic.parse_obj_as(python_type, value)
+
+
+def _coerce_lax(values: pd.Series, python_type: type, valid: pd.Series):
+    """Validate the rows not in `valid` one at a time with pydantic"""
+    validator = _lax_validator(python_type)
+    converted = values.to_numpy(dtype=object, copy=True)
+    ok = valid.to_numpy(copy=True)
+    for i in np.flatnonzero(~ok):
+        try:
+            converted[i] = validator(converted[i])
+        except pydantic.ValidationError:
+            continue
+        ok[i] = True
+    return pd.Series(converted, index=values.index), pd.Series(ok, index=values.index)
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+def _row_error(name: str, bad: pd.Series, error_type: str, msg: str) -> dict:
+    """Report the first failing row of a column, by its index label"""
+    row = bad.index[np.flatnonzero(bad.to_numpy())[0]]
+    return {"type": error_type, "loc": ("body", row, name), "msg": msg}
@@ -0,0 +1,51 @@
+from starlette.requests import ClientDisconnect
+
+
+async def iter_body(receive):
+    """Yield the pieces of a request body from an ASGI `receive` callable"""
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnect()
+        yield message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+
+async def read_body(receive) -> bytes:
+    """Read a whole request body from an ASGI `receive` callable"""
+    return b"".join([chunk async for chunk in iter_body(receive)])
+
+
+class FastRouteMiddleware:
+    """ASGI middleware that answers some POST routes without FastAPI
+
+    Requests whose path is in `routes` are sent straight to that route's
+    handler, skipping the router, FastAPI's dependency resolution, request
+    validation and response handling. A handler returns False, before reading
+    the body, to pass a request it does not handle on to the app.
+
+    Parameters
+    ----------
+    app :
+        ASGI application
+    routes : dict
+        Handlers by path. Handlers are ASGI callables that return whether they
+        handled the request. The dict can be changed after the app starts.
+    """
+
+    def __init__(self, app, routes: dict):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            path = scope["path"]
+            root_path = scope.get("root_path")
+            if root_path:
+                path = path.removeprefix(root_path)
+            handler = self.routes.get(path)
+            if handler is not None and await handler(scope, receive, send):
+                return
+
+        await self.app(scope, receive, send)
@@ -1,27 +1,292 @@
+import asyncio
+import copy
+import hashlib
+import inspect
 import json
 import logging
 import re
+import threading
 import webbrowser
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from textwrap import dedent
+from time import perf_counter
 from typing import Callable, List, Union
 from urllib.parse import urljoin
 from warnings import warn
 
 import httpx
+import numpy as np
 import pandas as pd
 import requests
 import uvicorn
-from fastapi import FastAPI, Request
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse
+from fastapi.responses import (
+    HTMLResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.requests import ClientDisconnect
+from .admission import AdmissionLimiter, AdmissionMiddleware
+from .batching import MicroBatcher, SingleFlight, run_in_chunks
+from .compression import CompressionMiddleware, compress
+from .limits import BodySizeLimitMiddleware
+from .cache import PredictionCache
+from .canary import TrafficSplit
+from .formats import (
+    ARROW_STREAM,
+    NDJSON,
+    accepts,
+    accepts_json,
+    arrow_exists,
+    arrow_to_frame,
+    columns_to_frame,
+    dumps,
+    is_tabular,
+    iter_ndjson,
+    media_type,
+    parse_json,
+    RecordStream,
+    StaticDocument,
+    to_arrow,
+    to_ndjson,
+    validate,
+    validate_records,
+    VetiverJSONResponse,
+)
 from .helpers import api_data_to_frame, response_to_frame
+from .handlers.base import BaseHandler
 from .handlers.sklearn import SKLearnHandler
 from .meta import VetiverMeta
-from .utils import _jupyter_nb, get_workbench_path
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, EndpointMetrics, Metrics
+from .prefork import serve_prefork
+from .routing import FastRouteMiddleware, iter_body, read_body
+from .prototype import PrototypeValidator
+from .utils import _jupyter_nb, get_workbench_path, serialize_prototype
 from .vetiver_model import VetiverModel
 from .types import SklearnPredictionTypes
 
+EXECUTORS = ("thread", "process", "event_loop")
+
+UNIX_SCHEME = "unix://"
+# pooled clients for Unix domain sockets, reused across calls to `predict`
+_unix_clients = {}
+
+# endpoint functions available inside process pool workers, keyed by endpoint name
+_worker_endpoints = {}
+
+
+def _init_worker(endpoints: dict):
+    _worker_endpoints.update(endpoints)
+
+
+def _call_in_worker(endpoint_name: str, served_data, kw: dict):
+    return _worker_endpoints[endpoint_name](served_data, **kw)
+
+
+ARROW_SCHEMA = {"type": "string", "format": "binary"}
+
+# JSON bodies up to this size are read whole instead of parsed as they arrive
+_SMALL_BODY = 64 * 1024
+# below this many rows, checking each row with the pydantic prototype is faster
+# than building and checking a batch with `PrototypeValidator`
+_SMALL_BATCH_ROWS = 64
+
+
+def _content_length(headers: Headers):
+    """Size of the request body from its Content-Length header, if known"""
+    try:
+        return int(headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+
+class _BodyStreamingResponse(StreamingResponse):
+    """Streaming response whose content is still reading the request body
+
+    `StreamingResponse` listens for the client disconnecting by reading from
+    `receive` while it streams, which throws away any body messages it gets.
+    Here only the content reads `receive`, and a disconnect ends the request
+    stream it reads from instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def _accepts_as_array(endpoint_fx) -> bool:
+    """Check if an endpoint is a built-in handler method that takes `as_array`"""
+    if not isinstance(getattr(endpoint_fx, "__self__", None), BaseHandler):
+        return False
+    # custom handlers may pass their keywords on to the model, so only methods
+    # defined by vetiver's own handlers get the keyword
+    module = getattr(endpoint_fx.__func__, "__module__", "")
+    if not module.startswith("vetiver.handlers.") or module == "vetiver.handlers.base":
+        return False
+    parameters = inspect.signature(endpoint_fx).parameters.values()
+    return any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters)
+
+
+class VetiverRoute(APIRoute):
+    """Route for `vetiver_post` endpoints that also accepts non-JSON bodies
+
+    Requests with a Content-Type in `media_handlers` are sent to that handler,
+    all other requests go through FastAPI's usual body parsing and validation.
+    A handler can return None to hand the request back to FastAPI.
+
+    Requests are cancelled once `request_timeout` seconds have passed, or the
+    number of seconds in the client's `timeout_header`, whichever is sooner, and
+    when `cancel_on_disconnect` is set and the client goes away. Requests,
+    errors, timeouts, disconnects and in-flight requests are counted in `stats`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.media_handlers = {}
+        self.stats = EndpointMetrics()
+        self.request_timeout = None
+        self.timeout_header = None
+        self.cancel_on_disconnect = False
+        super().__init__(*args, **kwargs)
+
+    def get_route_handler(self):
+        route_handler = super().get_route_handler()
+
+        async def handle(request: Request) -> Response:
+            content_type = media_type(request.headers.get("content-type"))
+            handler = self.media_handlers.get(content_type)
+            if handler is not None:
+                response = await handler(request)
+                if response is not None:
+                    return response
+            return await route_handler(request)
+
+        async def vetiver_route_handler(request: Request) -> Response:
+            return await self.serve(
+                lambda receive: handle(Request(request.scope, receive)),
+                request.scope,
+                request.receive,
+            )
+
+        return vetiver_route_handler
+
+    async def serve(self, run, scope, receive) -> Response:
+        """Run a request with this route's metrics, deadline and cancellation
+
+        Parameters
+        ----------
+        run :
+            Coroutine function that takes an ASGI `receive` callable and returns
+            the response
+        scope : dict
+            ASGI connection scope
+        receive :
+            ASGI `receive` callable
+        """
+        stats = self.stats
+        stats.requests += 1
+        stats.in_flight += 1
+        # FastAPI parses and validates the body before calling the endpoint
+        start = scope["vetiver.start"] = perf_counter()
+        try:
+            # time waiting for admission counts against the deadline
+            deadline, status = self._deadline(
+                Headers(scope=scope), scope.get("vetiver.arrival", start)
+            )
+            if deadline is None and not self.cancel_on_disconnect:
+                return await run(receive)
+            return await self._run_cancellable(run, receive, deadline, status)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+
+    def _deadline(self, headers: Headers, arrival: float):
+        """When a request times out, and the status to send when it does
+
+        Timeouts set by the client get a 408 status and the server's own
+        timeout a 504, to tell client impatience apart from server slowness.
+        """
+        deadline, status = None, None
+        if self.request_timeout is not None:
+            deadline, status = arrival + self.request_timeout, 504
+
+        header = headers.get(self.timeout_header) if self.timeout_header else None
+        try:
+            client_deadline = arrival + float(header) if header else None
+        except ValueError:
+            client_deadline = None
+        if client_deadline is not None and (
+            deadline is None or client_deadline <= deadline
+        ):
+            deadline, status = client_deadline, 408
+
+        return deadline, status
+
+    async def _run_cancellable(self, run, receive, deadline, status):
+        """Run a request, cancelling it at its deadline or if the client leaves"""
+        body_read = asyncio.Event()
+
+        async def tracking_receive():
+            message = await receive()
+            if message["type"] == "http.disconnect" or not message.get("more_body"):
+                body_read.set()
+            return message
+
+        async def wait_for_disconnect():
+            # once the body is read, the next message is the client disconnecting
+            await body_read.wait()
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        work = asyncio.ensure_future(run(tracking_receive))
+        waiters = {work}
+        watcher = None
+        if self.cancel_on_disconnect:
+            watcher = asyncio.ensure_future(wait_for_disconnect())
+            waiters.add(watcher)
+        timeout = None if deadline is None else max(deadline - perf_counter(), 0)
+
+        try:
+            done, _ = await asyncio.wait(
+                waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            if not work.done():
+                # work waiting in a queue or executor is dropped before it starts
+                work.cancel()
+
+        if work in done:
+            return work.result()
+        if watcher in done:
+            self.stats.disconnects += 1
+            # nginx's status for a client that closed the connection
+            return Response(status_code=499)
+        self.stats.timeouts += 1
+        return PlainTextResponse(
+            "Deadline exceeded before the prediction finished", status_code=status
+        )
+
 
 class VetiverAPI:
     """Create model aware API
@@ -36,6 +301,129 @@ class VetiverAPI:
         Determine if data prototype should be enforced
     app_factory :
         Type of API to be deployed
+    executor : str
+        Where synchronous endpoint functions are run. One of "thread" (a bounded
+        thread pool), "process" (a process pool) or "event_loop" (directly on the
+        event loop, blocking other requests). Coroutine functions are always
+        awaited on the event loop.
+    max_workers : int
+        Maximum number of threads or processes used by `executor`. Defaults to
+        the `concurrent.futures` default for the chosen pool.
+    max_batch_rows : int
+        If set, concurrent requests to batched endpoints are combined into one
+        call of up to `max_batch_rows` rows. By default, only the model's
+        prediction endpoints are batched. Requires `check_prototype=True`.
+    batch_timeout_ms : float
+        Maximum time in milliseconds to wait for more requests before running a
+        batch.
+    cache_size : int
+        If set, predictions are cached per input row, keeping up to `cache_size`
+        rows per endpoint. Only rows not in the cache are sent to the model. By
+        default, only the model's prediction endpoints are cached. The cache is
+        cleared when the model's `metadata.version` changes. Requires
+        `check_prototype=True`.
+    cache_ttl : float
+        Seconds before a cached prediction expires. Cached predictions do not
+        expire by default.
+    single_flight : bool
+        If True, concurrent requests to the same endpoint with identical bodies
+        share a single call to the endpoint function, and all receive its result.
+    stream_chunk_rows : int
+        Number of rows scored at a time for newline-delimited JSON requests,
+        and validated at a time as a JSON array of records arrives.
+    max_request_rows : int
+        If set, requests with more rows are rejected with a 413 status, before
+        they are validated where possible. For newline-delimited JSON, the
+        limit applies to the whole stream.
+    predict_chunk_rows : int
+        If set, inputs with more rows are passed to the endpoint function
+        `predict_chunk_rows` rows at a time, one chunk after another, and the
+        outputs are joined. Memory used by the model then depends on the chunk
+        size rather than the request size. By default, only the model's
+        prediction endpoints are chunked. Requires `check_prototype=True`.
+    max_body_size : int
+        If set, request bodies larger than this many bytes, after decompression,
+        are rejected with a 413 status. Bodies that declare a larger
+        `Content-Length` are rejected before they are read, and others as soon
+        as the limit is passed.
+    websocket : bool
+        If True, add a `/ws` WebSocket route for scoring over a long-lived
+        connection.
+    websocket_max_in_flight : int
+        Maximum number of messages scored at once on one WebSocket connection.
+    show_metrics : bool
+        If True, add a `/metrics` route with latency histograms and counters for
+        each POST endpoint, in Prometheus text exposition format. Metrics are
+        recorded either way.
+    max_concurrency : int
+        If set, at most `max_concurrency` POST requests run at once, and up to
+        `max_queue` more wait their turn. Further requests are rejected with a
+        503 status and a `Retry-After` header, so load balancers can shed load
+        instead of letting latency grow for every client.
+    max_queue : int
+        Number of POST requests that can wait for a free slot.
+    max_get_concurrency : int
+        If set, at most `max_get_concurrency` requests to other routes, such as
+        `/ping` and `/metadata`, run at once. These have their own limit, so
+        health checks still answer while predictions are saturated.
+    retry_after : int
+        Seconds sent in the `Retry-After` header of rejected requests.
+    warmup : int
+        Number of synthetic requests sent to each POST endpoint when the app
+        starts, to load lazy imports and thread pools before real traffic arrives.
+        `/ping` returns a 503 status until warmup has finished.
+    warmup_data : pd.DataFrame
+        Data used for warmup requests. Defaults to one row built from the
+        examples stored in the model's prototype.
+    board :
+        If given, a `pins` board that is checked every `reload_interval` seconds
+        for a newer version of the model's pin. New versions are loaded and
+        warmed up in a background thread, then swapped in without a restart. See
+        `reload()`.
+    reload_interval : float
+        Seconds between checks of `board` for a new model version.
+    request_timeout : float
+        Seconds a POST request may take, counted from when it arrives, before it
+        is cancelled with a 504 status. Work still waiting in a queue, such as
+        a batch or the executor's queue, is dropped before it starts.
+    timeout_header : str
+        Request header in which clients can send their own timeout, in seconds.
+        Requests that exceed it are cancelled with a 408 status.
+    cancel_on_disconnect : bool
+        If True, work for a POST request is cancelled when its client
+        disconnects, and a 499 status is logged. Watching for the disconnect
+        adds a little overhead to every request, so this is off by default.
+    compression_min_size : int
+        Responses of at least this many bytes are compressed with `zstd` or
+        `gzip`, whichever the client prefers in its `Accept-Encoding` header.
+        Responses are not compressed if None. Request bodies sent with a
+        `Content-Encoding` of `gzip` or `zstd` are always decompressed.
+    candidate : VetiverModel
+        A second model, such as a new version of `model`, to compare against
+        the primary model on the endpoints that use `model.handler_predict`.
+        It must accept data matching the primary model's prototype.
+    canary_fraction : float
+        Share of requests, between 0 and 1, answered by `candidate` instead of
+        `model`.
+    shadow : bool
+        If True, requests answered by `model` are also scored by `candidate` in
+        the background, after the response is ready, and the outputs are
+        compared. See `candidate_info()`.
+    shadow_max_in_flight : int
+        Maximum number of background shadow calls per endpoint. Requests beyond
+        this are not shadowed, so the candidate cannot take over the workers.
+    show_batch : bool
+        If True, add a `/batch` route that takes a list of `endpoints` and one
+        set of `data`, validates the data once, and runs the endpoints
+        concurrently on it, returning their results keyed by endpoint name.
+    fast_routes : bool
+        If True, JSON requests to `vetiver_post` endpoints are answered by a
+        minimal ASGI handler that reads the body, checks it against the compiled
+        prototype and writes the encoded predictions, skipping FastAPI's routing,
+        dependency resolution and response handling. The routes are documented
+        in the OpenAPI schema as usual, and other content types still go through
+        FastAPI. Worthwhile for small models, where the framework costs more
+        than the prediction.
     **kwargs: dict
         Deprecated parameters.
 
@@ -64,6 +452,10 @@ class VetiverAPI:
 
     Parameter `check_ptype` was changed to `check_prototype`. Handling of `check_ptype`
     will be removed in a future version.
+
+    With `executor="process"`, endpoint functions and their input data must be
+    picklable. Endpoint functions are sent to each worker once, when the pool is
+    first used.
     """
 
     app = None
@@ -74,12 +466,95 @@ class VetiverAPI:
         show_prototype: bool = True,
         check_prototype: bool = True,
         app_factory=FastAPI,
+        executor: str = "thread",
+        max_workers: int = None,
+        max_batch_rows: int = None,
+        batch_timeout_ms: float = 5.0,
+        cache_size: int = None,
+        cache_ttl: float = None,
+        single_flight: bool = False,
+        stream_chunk_rows: int = 1000,
+        max_request_rows: int = None,
+        predict_chunk_rows: int = None,
+        max_body_size: int = None,
+        websocket: bool = False,
+        websocket_max_in_flight: int = 64,
+        show_metrics: bool = False,
+        max_concurrency: int = None,
+        max_queue: int = 0,
+        max_get_concurrency: int = None,
+        retry_after: int = 1,
+        warmup: int = 0,
+        warmup_data: pd.DataFrame = None,
+        board=None,
+        reload_interval: float = 60.0,
+        request_timeout: float = None,
+        timeout_header: str = "X-Request-Timeout",
+        cancel_on_disconnect: bool = False,
+        compression_min_size: int = 1024,
+        candidate: VetiverModel = None,
+        canary_fraction: float = 0.0,
+        shadow: bool = False,
+        shadow_max_in_flight: int = 4,
+        show_batch: bool = False,
+        fast_routes: bool = False,
         **kwargs,
     ) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(
+                f"executor must be one of {EXECUTORS}, not {repr(executor)}"
+            )
+
         self.model = model
         self.app_factory = app_factory
         self.app = app_factory()
         self.workbench_path = None
+        self.executor = executor
+        self.max_workers = max_workers
+        self._pool = None
+        self._worker_endpoints = {}
+        self.max_batch_rows = max_batch_rows
+        self.batch_timeout_ms = batch_timeout_ms
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._caches = {}
+        self.single_flight = single_flight
+        self._single_flight = SingleFlight()
+        self.stream_chunk_rows = stream_chunk_rows
+        self.max_request_rows = max_request_rows
+        self.predict_chunk_rows = predict_chunk_rows
+        self.max_body_size = max_body_size
+        self.websocket = websocket
+        self.websocket_max_in_flight = websocket_max_in_flight
+        self._endpoints = {}
+        self.show_metrics = show_metrics
+        self._metrics = Metrics()
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_get_concurrency = max_get_concurrency
+        self.retry_after = retry_after
+        self._documents = {}
+        self.warmup = warmup
+        self.warmup_data = warmup_data
+        self.ready = not warmup
+        self.board = board
+        self.reload_interval = reload_interval
+        self._registrations = {}
+        self._loop = None
+        self._stop_watching = threading.Event()
+        self._reload_lock = threading.Lock()
+        self.request_timeout = request_timeout
+        self.timeout_header = timeout_header
+        self.cancel_on_disconnect = cancel_on_disconnect
+        self.compression_min_size = compression_min_size
+        self.candidate = candidate
+        self.canary_fraction = canary_fraction
+        self.shadow = shadow
+        self.shadow_max_in_flight = shadow_max_in_flight
+        self._splits = {}
+        self.show_batch = show_batch
+        self.fast_routes = fast_routes
+        self._fast_routes = {}
 
         if "check_ptype" in kwargs:
             check_prototype = kwargs.pop("check_ptype")
@@ -95,12 +570,44 @@ class VetiverAPI:
 
         self.show_prototype = show_prototype
         self.check_prototype = check_prototype
+        self._validator = (
+            PrototypeValidator(self.model.prototype)
+            if check_prototype and self.model.prototype is not None
+            else None
+        )
 
         self._init_app()
 
     def _init_app(self):
         app = self.app
         app.openapi = self._custom_openapi
+        if self.fast_routes:
+            # innermost, so admission and compression still apply
+            app.add_middleware(FastRouteMiddleware, routes=self._fast_routes)
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=self.compression_min_size,
+            max_size=self.max_body_size,
+        )
+        if self.max_body_size is not None:
+            # outside compression, so compressed bodies are limited as they arrive
+            app.add_middleware(BodySizeLimitMiddleware, max_size=self.max_body_size)
+
+        if self.max_concurrency or self.max_get_concurrency:
+            app.add_middleware(
+                AdmissionMiddleware,
+                post_limiter=(
+                    AdmissionLimiter(self.max_concurrency, self.max_queue)
+                    if self.max_concurrency
+                    else None
+                ),
+                get_limiter=(
+                    AdmissionLimiter(self.max_get_concurrency)
+                    if self.max_get_concurrency
+                    else None
+                ),
+                retry_after=self.retry_after,
+            )
 
         @app.on_event("startup")
         async def startup_event():
@@ -109,6 +616,22 @@ class VetiverAPI:
                 logger.info(f"VetiverAPI starting at {self.workbench_path}")
             else:
                 logger.info("VetiverAPI starting...")
+            self._render_documents()
+            self._loop = asyncio.get_running_loop()
+            if self.board is not None:
+                self._stop_watching.clear()
+                threading.Thread(
+                    target=self._watch_board, name="vetiver-reload", daemon=True
+                ).start()
+            if self.warmup:
+                # run in the background so /ping can answer while warming up
+                self._warmup_task = asyncio.ensure_future(self._warm_up())
+
+        @app.on_event("shutdown")
+        async def shutdown_event():
+            self._stop_watching.set()
+            self._loop = None
+            self._shutdown_pool()
 
         @app.get("/", include_in_schema=False)
         def docs_redirect():
@@ -128,34 +651,49 @@ class VetiverAPI:
         @app.get("/ping", include_in_schema=True)
         async def ping():
             """Ping endpoint for health check"""
+            if not self.ready:
+                return VetiverJSONResponse({"ping": "warming up"}, status_code=503)
             return {"ping": "pong"}
 
         @app.get("/metadata")
-        async def get_metadata():
+        async def get_metadata(request: Request):
             """Get metadata from model"""
-            return self.model.metadata.to_dict()
+            return self._document_response("metadata", request)
 
         if self.show_prototype is True:
 
             @app.get("/prototype")
-            async def get_prototype():
-                # to handle pydantic<2 and >=2
-                prototype_schema = getattr(
-                    self.model.prototype,
-                    "model_json_schema",
-                    self.model.prototype.schema_json,
-                )()
-                # pydantic<2 returns a string, need to handle to json format
-                if isinstance(prototype_schema, str):
-                    prototype_schema = json.loads(prototype_schema)
-                for key, value in prototype_schema["properties"].items():
-                    value.pop("title", None)
-                return prototype_schema
+            async def get_prototype(request: Request):
+                return self._document_response("prototype", request)
+
+        if app.openapi_url:
+            # serve the pre-encoded schema instead of FastAPI's own route
+            app.router.routes = [
+                route
+                for route in app.router.routes
+                if getattr(route, "path", None) != app.openapi_url
+            ]
+
+            @app.get(app.openapi_url, include_in_schema=False)
+            async def get_openapi_schema(request: Request):
+                return self._document_response("openapi", request)
 
         self.vetiver_post(
             self.model.handler_predict, "predict", check_prototype=self.check_prototype
         )
 
+        if self.websocket:
+            app.add_api_websocket_route("/ws", self._websocket_predict)
+
+        if self.show_batch:
+            self._add_batch_route()
+
+        if self.show_metrics:
+
+            @app.get("/metrics", include_in_schema=False)
+            async def metrics():
+                return Response(self._metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
         @app.get("/__docs__", response_class=HTMLResponse, include_in_schema=False)
         async def rapidoc():
             # save as html html.tpl, .format {spec_url}
@@ -204,6 +742,9 @@ class VetiverAPI:
         self,
         endpoint_fx: Union[Callable, SklearnPredictionTypes],
         endpoint_name: str = None,
+        batch: bool = None,
+        cache: bool = None,
+        chunk: bool = None,
         **kw,
     ):
         """Define a new POST endpoint that utilizes the model's input data.
@@ -221,6 +762,23 @@ class VetiverAPI:
         endpoint_name : str
             The name of the endpoint to be created.
 
+        batch : bool
+            Whether concurrent requests should be combined into a single call to
+            `endpoint_fx` when `max_batch_rows` is set on the VetiverAPI. The
+            function must return one prediction per input row. Defaults to
+            batching only the model's `handler_predict`.
+
+        cache : bool
+            Whether predictions should be cached per input row when `cache_size`
+            is set on the VetiverAPI. The function must return one prediction per
+            input row. Defaults to caching only the model's `handler_predict`.
+
+        chunk : bool
+            Whether large inputs should be passed to `endpoint_fx` in chunks of
+            `predict_chunk_rows` rows when that is set on the VetiverAPI. The
+            function must return one prediction per input row. Defaults to
+            chunking only the model's `handler_predict`.
+
         Examples
         -------
         ```python
@@ -236,6 +794,30 @@ class VetiverAPI:
 
         v_api.vetiver_post(sum_values, "sums")
         ```
+
+        Notes
+        -----
+        Besides JSON, endpoints accept request bodies in Arrow IPC streaming format
+        (Content-Type `application/vnd.apache.arrow.stream`) when `pyarrow` is
+        installed. The Arrow schema is checked against the model's prototype once,
+        rather than row by row. Responses are returned as Arrow when the request's
+        Accept header asks for `application/vnd.apache.arrow.stream`.
+
+        When `check_prototype` is True, JSON bodies can also be columnar, either
+        an object of columns such as `{"x": [1, 2], "y": [3, 4]}` or the output of
+        `DataFrame.to_json(orient="split")`.
+
+        Requests with Content-Type `application/x-ndjson` hold one JSON record per
+        line. They are scored `stream_chunk_rows` rows at a time, and predictions
+        are streamed back as newline-delimited JSON as each chunk finishes, so
+        memory use does not grow with the size of the request.
+
+        Batches are checked column-wise by a `PrototypeValidator` compiled from the
+        model's prototype when the validator can express every rule of the
+        prototype. Otherwise, such as for prototypes with custom pydantic
+        validators, records, columns and Arrow batches are all validated row by
+        row by the prototype. Short arrays of records in small bodies are also
+        validated row by row, since that is faster than building a batch.
         """
 
         if not isinstance(endpoint_fx, Callable):
@@ -256,6 +838,9 @@ class VetiverAPI:
             self.vetiver_post(
                 self.model.handler_predict,
                 endpoint_fx,
+                batch=batch,
+                cache=cache,
+                chunk=chunk,
                 check_prototype=self.check_prototype,
                 prediction_type=endpoint_fx,
             )
@@ -263,33 +848,863 @@ class VetiverAPI:
 
         endpoint_name = endpoint_name or endpoint_fx.__name__
         endpoint_doc = dedent(endpoint_fx.__doc__) if endpoint_fx.__doc__ else None
+        # kept to register the endpoint again when the model is replaced
+        self._registrations[endpoint_name] = (endpoint_fx, batch, cache, chunk, kw)
+
+        if self.executor == "process":
+            self._worker_endpoints[endpoint_name] = endpoint_fx
+            # workers receive endpoints when they start, so restart with the new one
+            self._shutdown_pool()
+
+        if _accepts_as_array(endpoint_fx):
+            # built-in handlers can skip .tolist(), the response encodes arrays
+            kw = {"as_array": True, **kw}
+
+        if batch is None:
+            batch = endpoint_fx == self.model.handler_predict
+        batcher = (
+            MicroBatcher(
+                partial(self._run_endpoint, endpoint_name, endpoint_fx, kw=kw),
+                max_rows=self.max_batch_rows,
+                timeout_ms=self.batch_timeout_ms,
+            )
+            if batch and self.max_batch_rows and self.check_prototype
+            else None
+        )
 
-        # this must be split up this way to preserve the correct type hints for
-        # the input_data schema validation via Pydantic + FastAPI
-        input_data_type = (
-            List[self.model.prototype] if self.check_prototype else Request
+        if chunk is None:
+            chunk = endpoint_fx == self.model.handler_predict
+        chunk_rows = self.predict_chunk_rows if chunk and self.check_prototype else None
+
+        if cache is None:
+            cache = endpoint_fx == self.model.handler_predict
+        if cache and self.cache_size and self.check_prototype:
+            self._caches[endpoint_name] = PredictionCache(
+                self.cache_size, ttl=self.cache_ttl
+            )
+        else:
+            self._caches.pop(endpoint_name, None)
+        prediction_cache = self._caches.get(endpoint_name)
+
+        if self.candidate is not None and endpoint_fx == self.model.handler_predict:
+            candidate_name = f"{endpoint_name}:candidate"
+            candidate_fx = self.candidate.handler_predict
+            if self.executor == "process":
+                self._worker_endpoints[candidate_name] = candidate_fx
+            candidate_predict = partial(
+                self._run_endpoint, candidate_name, candidate_fx, kw=kw
+            )
+            if chunk_rows:
+                candidate_predict = partial(
+                    run_in_chunks, candidate_predict, chunk_rows=chunk_rows
+                )
+            self._splits[endpoint_name] = TrafficSplit(
+                candidate_predict,
+                fraction=self.canary_fraction,
+                shadow=self.shadow,
+                max_in_flight=self.shadow_max_in_flight,
+            )
+        else:
+            self._splits.pop(endpoint_name, None)
+        split = self._splits.get(endpoint_name)
+
+        # a reload registers the endpoint again, so requests that are already
+        # reading their body keep checking against the model they started with
+        checks = (self._validator, self.model.prototype)
+        validator, prototype = checks
+
+        stats = self._metrics.endpoint(endpoint_name)
+        parse_time, validate_time, frame_time, predict_time, serialize_time = (
+            stats.stages[stage]
+            for stage in ("parse", "validate", "frame", "predict", "serialize")
         )
 
-        @self.app.post(
+        def check(data):
+            self._check_rows(len(data))
+            start = perf_counter()
+            if validator is not None and not validator.exact:
+                data = validate_records(data.to_dict("records"), prototype)
+            else:
+                data = validate(data, validator)
+            validate_time.observe(perf_counter() - start)
+            return data
+
+        async def call(served_data):
+            if batcher is not None:
+                return await batcher.submit(served_data)
+            return await self._run_endpoint(endpoint_name, endpoint_fx, served_data, kw)
+
+        async def predict(served_data):
+            start = perf_counter()
+            if chunk_rows:
+                output = await run_in_chunks(call, served_data, chunk_rows)
+            else:
+                output = await call(served_data)
+            predict_time.observe(perf_counter() - start)
+            return output
+
+        async def score(served_data):
+            # without a prototype, the body can be any JSON value
+            stats.rows += len(served_data) if hasattr(served_data, "__len__") else 1
+            if split is not None and split.use_candidate():
+                return await split.run_candidate(served_data)
+
+            start = perf_counter()
+            if prediction_cache is not None:
+                prediction_cache.check_version(self.model.metadata.version)
+                output = await prediction_cache.predict(served_data, predict)
+            else:
+                output = await predict(served_data)
+            if split is not None:
+                # shadow scoring is scheduled here and runs after we return
+                split.record_primary(served_data, output, perf_counter() - start)
+            return output
+
+        async def run(served_data, request: Request):
+            if not self.single_flight:
+                return await score(served_data)
+
+            return await run_once(
+                served_data,
+                media_type(request.headers.get("content-type")),
+                hashlib.blake2b(await request.body()).digest(),
+            )
+
+        async def run_once(served_data, content_type: str, digest: bytes):
+            if digest is None:
+                return await score(served_data)
+            key = (endpoint_name, content_type, digest)
+            return await self._single_flight.do(key, partial(score, served_data))
+
+        def respond(predictions, request: Request):
+            return encode(predictions, request.headers.get("accept"))
+
+        def encode(predictions, accept: str):
+            start = perf_counter()
+            arrow = accepts(accept, ARROW_STREAM)
+            if isinstance(predictions, Response):
+                response = predictions
+            elif arrow and is_tabular(predictions):
+                response = Response(
+                    to_arrow(predictions, endpoint_name), media_type=ARROW_STREAM
+                )
+            elif arrow and not accepts_json(accept):
+                raise HTTPException(
+                    status_code=406,
+                    detail=f"Output of '{endpoint_name}' cannot be written as Arrow.",
+                )
+            elif isinstance(predictions, (list, np.ndarray)):
+                response = VetiverJSONResponse({endpoint_name: predictions})
+            else:
+                response = VetiverJSONResponse(predictions)
+            # responses encode their content when they are created
+            serialize_time.observe(perf_counter() - start)
+            return response
+
+        if self.check_prototype:
+            # this must be split up this way to preserve the correct type hints for
+            # the input_data schema validation via Pydantic + FastAPI
+            input_data_type = List[prototype]
+
+            async def custom_endpoint(input_data: input_data_type, request: Request):
+                self._check_rows(len(input_data))
+                start = perf_counter()
+                validate_time.observe(start - request.scope["vetiver.start"])
+                served_data = api_data_to_frame(input_data)
+                frame_time.observe(perf_counter() - start)
+                predictions = await run(served_data, request)
+
+                return respond(predictions, request)
+
+        else:
+
+            async def custom_endpoint(input_data: Request):
+                body = await input_data.body()
+                start = perf_counter()
+                served_data = json.loads(body)
+                parse_time.observe(perf_counter() - start)
+                if isinstance(served_data, list):
+                    self._check_rows(len(served_data))
+                predictions = await run(served_data, input_data)
+
+                return respond(predictions, input_data)
+
+        async def arrow_endpoint(request: Request):
+            body = await request.body()
+            start = perf_counter()
+            columns = validator.columns if validator else None
+            data = arrow_to_frame(body, columns)
+            parse_time.observe(perf_counter() - start)
+            return respond(await run(check(data), request), request)
+
+        async def read_json(stream, length: int = None):
+            """Frame and validate a JSON body as its pieces arrive
+
+            Arrays of records are parsed and validated `stream_chunk_rows` rows
+            at a time, so oversized or invalid input is rejected before the
+            rest is read. Bodies known to be small are read whole, and short
+            arrays of records are checked by the pydantic prototype. Returns
+            the data, and a hash of the body if `single_flight` needs one.
+            """
+            small = length is not None and length <= _SMALL_BODY
+            digest = hashlib.blake2b() if self.single_flight else None
+            parser = None
+            pieces = []
+            first = b""
+            seconds = 0.0
+            try:
+                async for piece in stream:
+                    if digest is not None:
+                        digest.update(piece)
+                    if not first:
+                        first = piece.lstrip()[:1]
+                        if first == b"[" and not small:
+                            parser = RecordStream(validator, self.stream_chunk_rows)
+                    if parser is None:
+                        pieces.append(piece)
+                        continue
+                    start = perf_counter()
+                    parser.feed(piece)
+                    seconds += perf_counter() - start
+                    self._check_rows(parser.rows)
+                if parser is not None:
+                    start = perf_counter()
+                    data = parser.close()
+                    seconds += perf_counter() - start
+            finally:
+                if parser is not None:
+                    parse_time.observe(seconds - parser.validate_seconds)
+            digest = digest.digest() if digest is not None else None
+            if parser is not None:
+                validate_time.observe(parser.validate_seconds)
+                return data, digest
+
+            start = perf_counter()
+            body = b"".join(pieces)
+            data = columns_to_frame(body) if first == b"{" else None
+            parse_time.observe(perf_counter() - start)
+            if data is None:
+                # reports the same errors as FastAPI and the pydantic prototype
+                data = parse_json(body)
+                start = perf_counter()
+                data = self._frame_json(data, checks=checks)
+                validate_time.observe(perf_counter() - start)
+                return data, digest
+            return check(data), digest
+
+        async def json_endpoint(request: Request):
+            if validator.exact:
+                data, digest = await read_json(
+                    request.stream(), _content_length(request.headers)
+                )
+                content_type = media_type(request.headers.get("content-type"))
+                predictions = await run_once(data, content_type, digest)
+                return respond(predictions, request)
+
+            body = await request.body()
+            start = perf_counter()
+            if body.lstrip()[:1] != b"{":
+                # validated row by row by FastAPI and the pydantic prototype
+                return None
+            data = columns_to_frame(body)
+            parse_time.observe(perf_counter() - start)
+            return respond(await run(check(data), request), request)
+
+        def frame_chunk(start: int, rows: list):
+            began = perf_counter()
+            data = self._frame_json(rows, start, checks)
+            validate_time.observe(perf_counter() - began)
+            return data
+
+        def serialize_chunk(output) -> bytes:
+            start = perf_counter()
+            content = to_ndjson(output, endpoint_name)
+            serialize_time.observe(perf_counter() - start)
+            return content
+
+        async def ndjson_endpoint(request: Request):
+            chunks = iter_ndjson(request.stream(), self.stream_chunk_rows)
+            # score the first chunk before responding, so that invalid
+            # input can still be rejected with a 422 status
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                return Response(b"", media_type=NDJSON)
+            output = await score(frame_chunk(*first))
+
+            async def stream():
+                yield serialize_chunk(output)
+                try:
+                    async for start, rows in chunks:
+                        chunk = await score(frame_chunk(start, rows))
+                        yield serialize_chunk(chunk)
+                except RequestValidationError as e:
+                    # the status is already sent, so report the error in the body
+                    yield dumps({"detail": jsonable_encoder(e.errors())}) + b"\n"
+                except HTTPException as e:
+                    yield dumps({"detail": e.detail}) + b"\n"
+
+            return _BodyStreamingResponse(stream(), media_type=NDJSON)
+
+        async def fast_run(scope, receive):
+            if validator is not None and validator.exact:
+                data, digest = await read_json(
+                    iter_body(receive), _content_length(Headers(scope=scope))
+                )
+                return encode(await run_once(data, "application/json", digest), None)
+
+            body = await read_body(receive)
+            start = perf_counter()
+            columns = validator is not None and body.lstrip()[:1] == b"{"
+            data = columns_to_frame(body) if columns else parse_json(body)
+            parse_time.observe(perf_counter() - start)
+            # both count rows against `max_request_rows`, with or without a prototype
+            data = check(data) if columns else self._frame_json(data, checks=checks)
+            digest = hashlib.blake2b(body).digest() if self.single_flight else None
+            return encode(await run_once(data, "application/json", digest), None)
+
+        async def fast_endpoint(scope, receive, send) -> bool:
+            headers = Headers(scope=scope)
+            if media_type(headers.get("content-type")) not in (
+                "application/json",
+                "",
+            ) or accepts(headers.get("accept"), ARROW_STREAM):
+                return False
+            try:
+                response = await route.serve(partial(fast_run, scope), scope, receive)
+            except Exception as e:
+                response = await self._handle_exception(scope, receive, e)
+            await response(scope, receive, send)
+            return True
+
+        body_content = {NDJSON: {"schema": {"type": "string"}}}
+        if arrow_exists:
+            body_content[ARROW_STREAM] = {"schema": ARROW_SCHEMA}
+        openapi_extra = {"requestBody": {"content": body_content}}
+        self.app.router.add_api_route(
             urljoin("/", endpoint_name),
+            custom_endpoint,
+            methods=["POST"],
             name=endpoint_name,
             description=endpoint_doc,
+            response_class=VetiverJSONResponse,
+            openapi_extra=openapi_extra,
+            route_class_override=VetiverRoute,
+        )
+        route = self.app.router.routes.pop()
+        self._replace_route(route)
+        self._endpoints[endpoint_name] = score
+        # the OpenAPI schema now has a new route
+        self._documents = {}
+        self._configure_route(route, stats)
+        media_handlers = route.media_handlers
+        media_handlers[ARROW_STREAM] = arrow_endpoint
+        media_handlers[NDJSON] = ndjson_endpoint
+        if validator is not None:
+            # requests without a Content-Type are parsed as JSON by FastAPI
+            media_handlers["application/json"] = json_endpoint
+            media_handlers[""] = json_endpoint
+        if self.fast_routes:
+            self._fast_routes[route.path] = fast_endpoint
+
+    def _configure_route(self, route: VetiverRoute, stats: EndpointMetrics):
+        route.stats = stats
+        route.request_timeout = self.request_timeout
+        route.timeout_header = self.timeout_header
+        route.cancel_on_disconnect = self.cancel_on_disconnect
+
+    def _add_batch_route(self):
+        """Add a `/batch` route that runs several endpoints on one input"""
+
+        async def batch(request: Request):
+            payload = parse_json(await request.body())
+            names = self._batch_endpoints(payload)
+            # validated and framed once, for every endpoint
+            data = self._frame_json(payload.get("data"))
+            outputs = await _gather(
+                [
+                    self._endpoints[name](
+                        data if self._shares_input(name) else _copy_input(data)
+                    )
+                    for name in names
+                ]
+            )
+            return VetiverJSONResponse(dict(zip(names, outputs)))
+
+        record_schema = {"type": "object"}
+        if self.model.prototype is not None:
+            record_schema = {
+                "$ref": f"#/components/schemas/{self.model.prototype.__name__}"
+            }
+        body_schema = {
+            "type": "object",
+            "required": ["endpoints", "data"],
+            "properties": {
+                "endpoints": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Names of the POST endpoints to run",
+                },
+                "data": {"type": "array", "items": record_schema},
+            },
+        }
+        self.app.router.add_api_route(
+            "/batch",
+            batch,
+            methods=["POST"],
+            name="batch",
+            description="Run several POST endpoints on the same input, which is "
+            "validated once. Results are keyed by endpoint name.",
+            response_class=VetiverJSONResponse,
+            openapi_extra={
+                "requestBody": {
+                    "required": True,
+                    "content": {"application/json": {"schema": body_schema}},
+                }
+            },
+            route_class_override=VetiverRoute,
         )
-        async def custom_endpoint(input_data: input_data_type):
+        self._configure_route(
+            self.app.router.routes[-1], self._metrics.endpoint("batch")
+        )
+
+    def _batch_endpoints(self, payload) -> list:
+        """Check the endpoint names in a `/batch` payload, dropping repeats"""
+        names = payload.get("endpoints") if isinstance(payload, dict) else None
+        if not isinstance(names, list) or not names:
+            raise RequestValidationError(
+                [
+                    {
+                        "type": "missing",
+                        "loc": ("body", "endpoints"),
+                        "msg": "Expected a non-empty list of endpoint names",
+                    }
+                ]
+            )
+        errors = [
+            {
+                "type": "unknown_endpoint",
+                "loc": ("body", "endpoints", i),
+                "msg": f"Unknown endpoint {name}",
+            }
+            for i, name in enumerate(names)
+            if not isinstance(name, str) or name not in self._endpoints
+        ]
+        if errors:
+            raise RequestValidationError(errors)
+        return list(dict.fromkeys(names))
+
+    def _shares_input(self, endpoint_name: str) -> bool:
+        """Whether an endpoint can be given input that other endpoints also use
+
+        Model handlers only read their input. Other endpoint functions get their
+        own copy, since they may change it in place.
+        """
+        endpoint_fx = self._registrations[endpoint_name][0]
+        return isinstance(getattr(endpoint_fx, "__self__", None), BaseHandler)
+
+    async def _handle_exception(self, scope, receive, exc: Exception) -> Response:
+        """Build a response with the app's handler for an exception, if it has one
 
-            served_data = (
-                api_data_to_frame(input_data)
-                if self.check_prototype
-                else await input_data.json()
+        Fast routes run outside FastAPI's exception middleware, so errors such as
+        invalid input are handled here, the same way FastAPI would.
+        """
+        for cls in type(exc).__mro__:
+            handler = self.app.exception_handlers.get(cls)
+            if handler is not None:
+                response = handler(Request(scope, receive), exc)
+                if inspect.isawaitable(response):
+                    response = await response
+                return response
+        raise exc
+
+    def _frame_json(self, data, start: int = 0, checks: tuple = None):
+        """Validate parsed JSON records or columns, without FastAPI
+
+        Parameters
+        ----------
+        data : list or dict
+            List of records, or a dict of columns
+        start : int
+            Row number of the first record, used in error messages
+        checks : tuple
+            Validator and prototype an endpoint was registered with. Defaults to
+            those of the current model.
+        """
+        validator, prototype = checks or (self._validator, self.model.prototype)
+        if isinstance(data, list):
+            self._check_rows(start + len(data))
+        if validator is None:
+            return data
+        if isinstance(data, dict):
+            try:
+                data = pd.DataFrame(data)
+            except (ValueError, TypeError) as e:
+                raise RequestValidationError(
+                    [{"type": "columns_invalid", "loc": ("body",), "msg": str(e)}]
+                )
+            self._check_rows(len(data))
+            if not validator.exact:
+                return validate_records(data.to_dict("records"), prototype)
+        elif not isinstance(data, list) or not all(
+            isinstance(row, dict) for row in data
+        ):
+            raise RequestValidationError(
+                [
+                    {
+                        "type": "list_type",
+                        "loc": ("body",),
+                        "msg": "Input should be a list of records or dict of columns",
+                    }
+                ]
             )
-            predictions = endpoint_fx(served_data, **kw)
+        elif not validator.exact or 0 < len(data) < _SMALL_BATCH_ROWS:
+            return validate_records(data, prototype, start)
+        elif not data:
+            return validator.empty()
+        else:
+            data = pd.DataFrame(data, index=range(start, start + len(data)))
 
-            if isinstance(predictions, List):
-                return {endpoint_name: predictions}
+        return validate(data, validator).reset_index(drop=True)
+
+    def _check_rows(self, rows: int):
+        """Reject a request with more than `max_request_rows` rows"""
+        if self.max_request_rows is not None and rows > self.max_request_rows:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Request has {rows} rows, more than the limit of "
+                f"{self.max_request_rows}",
+            )
+
+    def _replace_route(self, route: VetiverRoute):
+        """Add a route, in place of any earlier POST route with the same path"""
+        routes = self.app.router.routes
+        for i, existing in enumerate(routes):
+            if isinstance(existing, VetiverRoute) and existing.path == route.path:
+                routes[i] = route
+                return
+        routes.append(route)
+
+    def reload(self, version: str = None) -> bool:
+        """Load a new version of the model from `board` and swap it in
+
+        The new model is loaded and warmed up in the calling thread, then the
+        model, prototype, metadata and every `vetiver_post` endpoint are swapped
+        in one step on the event loop, so requests keep being served throughout.
+        If warmup or the swap fails, the current model is kept.
+
+        Parameters
+        ----------
+        version : str
+            Version of the pin to load. Defaults to the latest version.
+
+        Returns
+        -------
+        bool
+            True if a new model was swapped in, False if `version` is already
+            being served.
+        """
+        if self.board is None:
+            raise ValueError("VetiverAPI needs a `board` to reload models from")
+
+        with self._reload_lock:
+            name = self.model.model_name
+            if version is None:
+                version = self.board.pin_meta(name).version.version
+            if version == self.model.metadata.version:
+                return False
+
+            model = VetiverModel.from_pin(self.board, name, version)
+            if isinstance(model.metadata, dict):
+                model.metadata = VetiverMeta.from_dict(model.metadata)
+            self._warm_up_model(model)
+
+            loop = self._loop
+            if loop is not None and loop.is_running():
+                asyncio.run_coroutine_threadsafe(
+                    self._swap_model_async(model), loop
+                ).result()
             else:
-                return predictions
+                self._swap_model(model)
 
-    def run(self, port: int = 8000, host: str = "127.0.0.1", quiet_open=False, **kw):
+        logging.getLogger("uvicorn.error").info(
+            f"VetiverAPI now serving {name} version {version}"
+        )
+        return True
+
+    def _watch_board(self):
+        logger = logging.getLogger("uvicorn.error")
+        while not self._stop_watching.wait(self.reload_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Model reload failed, keeping current model: {e}")
+
+    def _warm_up_model(self, model: VetiverModel):
+        """Run predictions with a model before it serves requests"""
+        if self.warmup_data is not None:
+            data = pd.DataFrame(self.warmup_data)
+        elif model.prototype is not None:
+            data = pd.DataFrame([json.loads(serialize_prototype(model.prototype))])
+        else:
+            return
+
+        if self.check_prototype and model.prototype is not None:
+            data = validate(data, PrototypeValidator(model.prototype))
+        for _ in range(max(self.warmup, 1)):
+            model.handler_predict(data, check_prototype=self.check_prototype)
+
+    async def _swap_model_async(self, model: VetiverModel):
+        self._swap_model(model)
+
+    def _swap_model(self, model: VetiverModel):
+        old_model = self.model
+        try:
+            self._install_model(model, old_model)
+        except Exception:
+            self._install_model(old_model, model)
+            raise
+
+    def _install_model(self, model: VetiverModel, replaced: VetiverModel):
+        self.model = model
+        self._validator = (
+            PrototypeValidator(model.prototype)
+            if self.check_prototype and model.prototype is not None
+            else None
+        )
+        for endpoint_name, (endpoint_fx, batch, cache, chunk, kw) in list(
+            self._registrations.items()
+        ):
+            if endpoint_fx == replaced.handler_predict:
+                endpoint_fx = model.handler_predict
+            # registering again also picks up the new prototype for validation
+            self.vetiver_post(
+                endpoint_fx, endpoint_name, batch=batch, cache=cache, chunk=chunk, **kw
+            )
+        self._render_documents()
+
+    def _warmup_body(self) -> bytes:
+        if self.warmup_data is not None:
+            if isinstance(self.warmup_data, pd.DataFrame):
+                return self.warmup_data.to_json(orient="records").encode()
+            return dumps(self.warmup_data)
+        if self.model.prototype is not None:
+            return f"[{serialize_prototype(self.model.prototype)}]".encode()
+        return None
+
+    async def _warm_up(self):
+        """Send synthetic requests to every POST endpoint, then mark the API ready"""
+        logger = logging.getLogger("uvicorn.error")
+        body = self._warmup_body()
+        if body is None:
+            logger.warning("No prototype or warmup_data, skipping warmup")
+            self.ready = True
+            return
+
+        transport = httpx.ASGITransport(app=self.app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://vetiver"
+            ) as client:
+                for endpoint_name in list(self._endpoints):
+                    for _ in range(self.warmup):
+                        response = await client.post(
+                            urljoin("/", endpoint_name),
+                            content=body,
+                            headers={"content-type": "application/json"},
+                        )
+                        if response.status_code != 200:
+                            logger.warning(
+                                f"Warmup request to {endpoint_name} failed: "
+                                f"{response.status_code} {response.text}"
+                            )
+                            break
+            logger.info("VetiverAPI warmup finished")
+        except Exception as e:
+            logger.warning(f"Warmup failed: {e}")
+        finally:
+            # warmup data should not be served from the cache later
+            for cache in self._caches.values():
+                cache.clear()
+            self.ready = True
+
+    def _prototype_schema(self) -> dict:
+        # to handle pydantic<2 and >=2
+        prototype_schema = getattr(
+            self.model.prototype,
+            "model_json_schema",
+            self.model.prototype.schema_json,
+        )()
+        # pydantic<2 returns a string, need to handle to json format
+        if isinstance(prototype_schema, str):
+            prototype_schema = json.loads(prototype_schema)
+        for key, value in prototype_schema["properties"].items():
+            value.pop("title", None)
+        return prototype_schema
+
+    def _render_documents(self):
+        """Encode the metadata, prototype and OpenAPI documents ahead of requests
+
+        Call again after replacing the model, so that clients see the new
+        documents.
+        """
+        builders = {
+            "metadata": lambda: self.model.metadata.to_dict(),
+            "openapi": self.app.openapi,
+        }
+        if self.show_prototype is True and self.model.prototype is not None:
+            builders["prototype"] = self._prototype_schema
+
+        self.app.openapi_schema = None
+        self._documents = {
+            name: StaticDocument(build()) for name, build in builders.items()
+        }
+
+    def _document_response(self, name: str, request: Request) -> Response:
+        if not self._documents:
+            self._render_documents()
+        if name not in self._documents:
+            return PlainTextResponse("Not Found", status_code=404)
+        return self._documents[name].response(
+            request.headers.get("if-none-match"),
+            request.headers.get("accept-encoding"),
+        )
+
+    async def _websocket_predict(self, websocket: WebSocket):
+        """Score prototype-shaped messages on a long-lived connection"""
+        await websocket.accept()
+        in_flight = asyncio.Semaphore(self.websocket_max_in_flight)
+        send_lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(message: dict):
+            async with send_lock:
+                await websocket.send_text(dumps(message).decode())
+
+        async def answer(message: dict):
+            request_id = message.get("id")
+            endpoint_name = message.get("endpoint", "predict")
+            try:
+                score = self._endpoints.get(endpoint_name)
+                if score is None:
+                    await send(
+                        {
+                            "id": request_id,
+                            "detail": f"Unknown endpoint {endpoint_name}",
+                        }
+                    )
+                    return
+                output = await score(self._frame_json(message.get("data")))
+                await send({"id": request_id, endpoint_name: output})
+            except RequestValidationError as e:
+                await send({"id": request_id, "detail": jsonable_encoder(e.errors())})
+            except Exception as e:
+                await send({"id": request_id, "detail": str(e)})
+            finally:
+                in_flight.release()
+
+        try:
+            while True:
+                text = await websocket.receive_text()
+                try:
+                    message = json.loads(text)
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    await send({"id": None, "detail": "Message must be a JSON object"})
+                    continue
+                # stop reading once too many messages are in flight
+                await in_flight.acquire()
+                task = asyncio.ensure_future(answer(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except WebSocketDisconnect:
+            for task in tasks:
+                task.cancel()
+
+    async def _run_endpoint(
+        self, endpoint_name: str, endpoint_fx, served_data, kw: dict
+    ):
+        """Call an endpoint function without blocking the event loop"""
+        if inspect.iscoroutinefunction(endpoint_fx):
+            return await endpoint_fx(served_data, **kw)
+        if self.executor == "event_loop":
+            return endpoint_fx(served_data, **kw)
+
+        loop = asyncio.get_running_loop()
+        if self.executor == "process":
+            return await loop.run_in_executor(
+                self._get_pool(), _call_in_worker, endpoint_name, served_data, kw
+            )
+        return await loop.run_in_executor(
+            self._get_pool(), partial(endpoint_fx, served_data, **kw)
+        )
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.executor == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(dict(self._worker_endpoints),),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="vetiver"
+                )
+        return self._pool
+
+    def _shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def cache_info(self) -> dict:
+        """Hit and miss counts of the prediction cache for each endpoint
+
+        Examples
+        -------
+        ```python
+        from vetiver import mock, VetiverModel, VetiverAPI
+        X, y = mock.get_mock_data()
+        model = mock.get_mock_model().fit(X, y)
+
+        v = VetiverModel(model = model, model_name = "my_model", prototype_data = X)
+        v_api = VetiverAPI(model = v, cache_size = 10_000)
+        v_api.cache_info()
+        ```
+        """
+        return {name: cache.info() for name, cache in self._caches.items()}
+
+    def candidate_info(self) -> dict:
+        """Traffic and disagreement between the model and its candidate, by endpoint
+
+        Examples
+        -------
+        ```python
+        from vetiver import mock, VetiverModel, VetiverAPI
+        X, y = mock.get_mock_data()
+        model = mock.get_mock_model().fit(X, y)
+        candidate = mock.get_mock_model().fit(X, y * 2)
+
+        v = VetiverModel(model = model, model_name = "my_model", prototype_data = X)
+        c = VetiverModel(model = candidate, model_name = "my_model", prototype_data = X)
+        v_api = VetiverAPI(model = v, candidate = c, shadow = True)
+        v_api.candidate_info()
+        ```
+        """
+        return {name: split.info() for name, split in self._splits.items()}
+
+    def run(
+        self,
+        port: int = 8000,
+        host: str = "127.0.0.1",
+        quiet_open=False,
+        workers: Union[int, str] = None,
+        threads_per_worker: int = None,
+        uds: str = None,
+        **kw,
+    ):
         """
         Start API
 
@@ -301,6 +1716,18 @@ class VetiverAPI:
             A valid IPv4 or IPv6 address, which the application will listen on.
         quiet_open : bool
             If host is a localhost address, try to automatically open API in browser
+        workers : int or str
+            Number of worker processes, or "auto" for one per CPU. Workers are
+            forked from this process after the model is loaded, so they share
+            its memory rather than each loading a copy. Runs in this process if
+            None. Requires a platform with `os.fork`.
+        threads_per_worker : int
+            BLAS and OpenMP threads for each worker. Defaults to the number of
+            CPUs divided by `workers`.
+        uds : str
+            Path of a Unix domain socket to listen on instead of `host` and
+            `port`, for clients on the same machine such as sidecars. Call it
+            with an endpoint such as `unix:///tmp/vetiver.sock:/predict`.
 
         Examples
         -------
@@ -318,7 +1745,7 @@ class VetiverAPI:
         """
         _jupyter_nb()
         self.workbench_path = get_workbench_path(port)
-        if port and host:
+        if port and host and uds is None:
             try:
                 if host == "127.0.0.1" and not quiet_open:
                     # quality of life for developing APIs locally
@@ -326,8 +1753,17 @@ class VetiverAPI:
             except Exception:
                 pass
         if self.workbench_path:
-            uvicorn.run(
-                self.app, port=port, host=host, root_path=self.workbench_path, **kw
+            kw["root_path"] = self.workbench_path
+        if uds is not None:
+            kw["uds"] = uds
+        if workers is not None:
+            serve_prefork(
+                self.app,
+                workers=None if workers == "auto" else workers,
+                threads_per_worker=threads_per_worker,
+                port=port,
+                host=host,
+                **kw,
             )
         else:
             uvicorn.run(self.app, port=port, host=host, **kw)
@@ -350,15 +1786,32 @@ class VetiverAPI:
         return self.app.openapi_schema
 
 
-def predict(endpoint, data: Union[dict, pd.DataFrame, pd.Series], **kw) -> pd.DataFrame:
+def predict(
+    endpoint,
+    data: Union[dict, pd.DataFrame, pd.Series],
+    arrow: bool = False,
+    compression: str = None,
+    compression_min_size: int = 1024,
+    **kw,
+) -> pd.DataFrame:
     """Make a prediction from model endpoint
 
     Parameters
     ----------
     endpoint :
-        URI path to endpoint
+        URI path to endpoint, or a Unix domain socket and path such as
+        `unix:///tmp/vetiver.sock:/predict`
     data : Union[dict, pd.DataFrame, pd.Series]
         New data for making predictions, such as a data frame.
+    arrow : bool
+        Send data and receive predictions in Arrow IPC streaming format, rather
+        than JSON. Requires `pyarrow`.
+    compression : str
+        Compress request bodies with "gzip" or "zstd". `zstd` requires the
+        `zstandard` package. Responses are decompressed by the HTTP client in
+        any case.
+    compression_min_size : int
+        Request bodies smaller than this many bytes are sent uncompressed.
 
     Returns
     -------
@@ -387,13 +1840,37 @@ def predict(endpoint, data: Union[dict, pd.DataFrame, pd.Series], **kw) -> pd.Da
     """
     if "test_client" in kw:
         requester = kw.pop("test_client")
+    elif endpoint.startswith(UNIX_SCHEME):
+        socket_path, endpoint = _split_unix_endpoint(endpoint)
+        requester = _unix_client(socket_path)
     else:
         requester = requests
 
-    # TO DO: arrow format
     # TO DO: dispatch
 
-    if isinstance(data, pd.DataFrame):
+    if compression is not None:
+        if arrow:
+            body = to_arrow(_to_frame(data), None)
+            headers = {"Content-Type": ARROW_STREAM, "Accept": ARROW_STREAM}
+        else:
+            body = _to_json(data)
+            headers = {"Content-Type": "application/json"}
+        if len(body) >= compression_min_size:
+            body = compress(body, compression)
+            headers["Content-Encoding"] = compression
+        response = requester.post(
+            endpoint, data=body, headers={**headers, **kw.pop("headers", {})}, **kw
+        )
+    elif arrow:
+        headers = {
+            "Content-Type": ARROW_STREAM,
+            "Accept": ARROW_STREAM,
+            **kw.pop("headers", {}),
+        }
+        response = requester.post(
+            endpoint, data=to_arrow(_to_frame(data), None), headers=headers, **kw
+        )
+    elif isinstance(data, pd.DataFrame):
         response = requester.post(
             endpoint, data=data.to_json(orient="records"), **kw
         )  # TO DO: httpx deprecating data in favor of content for TestClient
@@ -413,18 +1890,75 @@ def predict(endpoint, data: Union[dict, pd.DataFrame, pd.Series], **kw) -> pd.Da
             f"Could not obtain data from endpoint with error: {e}"
         )
 
+    if media_type(response.headers.get("content-type")) == ARROW_STREAM:
+        return arrow_to_frame(response.content)
+
     response_frame = response_to_frame(response)
 
     return response_frame
 
 
+async def _gather(awaitables: list) -> list:
+    """Run awaitables concurrently, cancelling the rest if one of them fails"""
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+def _copy_input(data):
+    if isinstance(data, pd.DataFrame):
+        return data.copy()
+    return copy.deepcopy(data)
+
+
+def _to_frame(data) -> pd.DataFrame:
+    if isinstance(data, pd.Series):
+        return data.to_frame().T
+    if isinstance(data, dict):
+        return pd.DataFrame([data])
+    return pd.DataFrame(data)
+
+
+def _to_json(data) -> bytes:
+    """Encode data as the JSON body `predict` sends"""
+    if isinstance(data, pd.DataFrame):
+        return data.to_json(orient="records").encode()
+    if isinstance(data, pd.Series):
+        return json.dumps([data.to_dict()]).encode()
+    if isinstance(data, dict):
+        return json.dumps([data]).encode()
+    return json.dumps(data).encode()
+
+
+def _split_unix_endpoint(endpoint: str):
+    """Split `unix://{socket_path}:{path}` into the socket path and a URL"""
+    socket_path, _, path = endpoint.removeprefix(UNIX_SCHEME).partition(":")
+    return socket_path, "http://localhost" + (path or "/predict")
+
+
+def _unix_client(socket_path: str) -> httpx.Client:
+    """HTTP client that keeps its connections to a Unix domain socket open"""
+    client = _unix_clients.get(socket_path)
+    if client is None:
+        client = _unix_clients[socket_path] = httpx.Client(
+            transport=httpx.HTTPTransport(uds=socket_path)
+        )
+    return client
+
+
 def vetiver_endpoint(url: str = "http://127.0.0.1:8000/predict") -> str:
     """Wrap url where VetiverModel will be deployed
 
     Parameters
     ----------
     url : str
-        URI path to endpoint
+        URI path to endpoint. For an API listening on a Unix domain socket,
+        the socket's path and the endpoint's path separated by a colon, such as
+        `unix:///tmp/vetiver.sock:/predict`.
 
     Returns
     -------
@@ -1,5 +1,6 @@
+import numpy as np
 import pytest
-from vetiver import VetiverModel, VetiverAPI
+from vetiver import mock, VetiverModel, VetiverAPI
 from vetiver.helpers import api_data_to_frame
 from starlette.testclient import TestClient
 
@@ -12,6 +13,15 @@ def sum_values_no_prototype(x):
     return api_data_to_frame(x).sum().to_list()
 
 
+@pytest.fixture
+def model() -> VetiverModel:
+    np.random.seed(500)
+    X, y = mock.get_mock_data()
+    model = mock.get_mock_model().fit(X, y)
+
+    return VetiverModel(model=model, prototype_data=X, model_name="my_model")
+
+
 @pytest.fixture
 def client(model: VetiverModel) -> TestClient:
     app = VetiverAPI(model, check_prototype=True)
@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+
+from vetiver import VetiverAPI
+from vetiver.admission import AdmissionLimiter
+
+
+async def slow_sum(x):
+    await asyncio.sleep(0.2)
+    return x.sum().to_list()
+
+
+async def _requests(app, calls):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        return await asyncio.gather(
+            *[getattr(c, m)(path, **kw) for m, path, kw in calls]
+        )
+
+
+def test_overload_rejected_with_retry_after(model):
+    api = VetiverAPI(model, max_concurrency=1, max_queue=1, retry_after=3)
+    api.vetiver_post(slow_sum, "sum")
+    body = {"json": [{"B": 1, "C": 2, "D": 3}]}
+
+    responses = asyncio.run(
+        _requests(api.app, [("post", "/sum", body)] * 3 + [("get", "/ping", {})])
+    )
+
+    statuses = sorted(r.status_code for r in responses[:3])
+    assert statuses == [200, 200, 503]
+    rejected = next(r for r in responses if r.status_code == 503)
+    assert rejected.headers["retry-after"] == "3"
+    # cheap routes have their own limit
+    assert responses[3].json() == {"ping": "pong"}
+
+
+def test_get_routes_limited_separately(model):
+    api = VetiverAPI(model, max_get_concurrency=1)
+
+    async def slow():
+        await asyncio.sleep(0.2)
+
+    api.app.get("/slow-ping")(slow)
+    responses = asyncio.run(
+        _requests(api.app, [("get", "/slow-ping", {}), ("get", "/ping", {})])
+    )
+
+    assert [r.status_code for r in responses] == [200, 503]
+
+
+def test_limiter_hands_slot_to_next_waiter():
+    async def run():
+        limiter = AdmissionLimiter(max_concurrency=1, max_queue=1)
+        assert await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        assert not await limiter.acquire()
+
+        limiter.release()
+        assert await waiter
+        assert limiter.active == 1
+        limiter.release()
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.active == 0
+    assert limiter.rejected == 1
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def run():
+        limiter = AdmissionLimiter(max_concurrency=1, max_queue=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.queued == 0
+    assert limiter.active == 1
@@ -0,0 +1,102 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+import numpy as np  # noqa
+import pandas as pd  # noqa
+from fastapi.testclient import TestClient  # noqa
+
+from vetiver import mock, VetiverModel, VetiverAPI, predict  # noqa
+from vetiver.formats import ARROW_STREAM, to_arrow  # noqa
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+@pytest.fixture
+def client(model) -> TestClient:
+    return TestClient(VetiverAPI(model).app)
+
+
+def test_predict_arrow(client, model):
+    response = predict(endpoint="/predict", data=X, arrow=True, test_client=client)
+
+    assert isinstance(response, pd.DataFrame)
+    assert response["predict"].tolist() == pytest.approx(model.model.predict(X))
+
+
+def test_arrow_request_json_response(client):
+    response = client.post(
+        "/predict",
+        content=to_arrow(X.head(3), None),
+        headers={"Content-Type": ARROW_STREAM},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/json"
+    assert len(response.json()["predict"]) == 3
+
+
+def test_json_request_arrow_response(client):
+    response = client.post(
+        "/predict",
+        json=X.head(3).to_dict(orient="records"),
+        headers={"Accept": ARROW_STREAM},
+    )
+
+    assert response.headers["content-type"] == ARROW_STREAM
+    assert pa.ipc.open_stream(response.content).read_pandas().shape == (3, 1)
+
+
+def test_arrow_extra_columns_dropped(client):
+    data = X.head(2).assign(extra="a")[["extra", "D", "C", "B"]]
+
+    response = predict(endpoint="/predict", data=data, arrow=True, test_client=client)
+
+    assert len(response) == 2
+
+
+@pytest.mark.parametrize(
+    "data",
+    [X.drop(columns="C"), X.assign(C="a")],
+)
+def test_arrow_schema_mismatch(client, data):
+    with pytest.raises(TypeError, match="C"):
+        predict(endpoint="/predict", data=data, arrow=True, test_client=client)
+
+
+def test_arrow_invalid_body(client):
+    response = client.post(
+        "/predict", content=b"not arrow", headers={"Content-Type": ARROW_STREAM}
+    )
+
+    assert response.status_code == 422
+
+
+def summary(x):
+    return {"rows": len(x)}
+
+
+@pytest.mark.parametrize(
+    "accept, status, content_type",
+    [
+        (f"{ARROW_STREAM}, application/json", 200, "application/json"),
+        (f"{ARROW_STREAM}, */*;q=0.1", 200, "application/json"),
+        (ARROW_STREAM, 406, "application/json"),
+    ],
+)
+def test_arrow_response_not_tabular(model, accept, status, content_type):
+    api = VetiverAPI(model)
+    api.vetiver_post(summary)
+    client = TestClient(api.app)
+
+    response = client.post(
+        "/summary",
+        json=X.head(3).to_dict(orient="records"),
+        headers={"Accept": accept},
+    )
+
+    assert response.status_code == status
+    assert response.headers["content-type"] == content_type
+    if status == 200:
+        assert response.json() == {"rows": 3}
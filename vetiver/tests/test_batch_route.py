@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+def total(x):
+    # changes its input, which must not reach the other endpoints
+    x["B"] = 0
+    return x.sum().to_list()
+
+
+@pytest.fixture
+def client(model) -> TestClient:
+    api = VetiverAPI(model, show_batch=True)
+    api.vetiver_post(total, "total")
+    api.vetiver_post(lambda x: x["B"].to_list(), "first")
+    return TestClient(api.app)
+
+
+def test_batch_runs_each_endpoint(client):
+    data = X.head(3).to_dict("records")
+
+    response = client.post(
+        "/batch", json={"endpoints": ["predict", "total", "first"], "data": data}
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "predict": client.post("/predict", json=data).json()["predict"],
+        "total": client.post("/total", json=data).json()["total"],
+        "first": X.head(3)["B"].to_list(),
+    }
+
+
+def test_batch_accepts_columns(client):
+    response = client.post(
+        "/batch",
+        json={"endpoints": ["first", "first"], "data": X.head(2).to_dict("list")},
+    )
+
+    assert response.json() == {"first": X.head(2)["B"].to_list()}
+
+
+@pytest.mark.parametrize(
+    "body,error",
+    [
+        (
+            {"endpoints": ["predict", "nope"], "data": [{"B": 1, "C": 2, "D": 3}]},
+            "nope",
+        ),
+        ({"endpoints": [], "data": [{"B": 1, "C": 2, "D": 3}]}, "endpoints"),
+        ({"endpoints": ["predict"], "data": [{"B": 1, "C": 2}]}, "missing"),
+    ],
+)
+def test_batch_invalid(client, body, error):
+    response = client.post("/batch", json=body)
+
+    assert response.status_code == 422
+    assert error in response.text
+
+
+def test_batch_documented(client):
+    schema = client.get("/openapi.json").json()
+    body = schema["paths"]["/batch"]["post"]["requestBody"]["content"]
+
+    ref = body["application/json"]["schema"]["properties"]["data"]["items"]["$ref"]
+    assert ref.split("/")[-1] in schema["components"]["schemas"]
+
+
+def test_batch_off_by_default(model):
+    client = TestClient(VetiverAPI(model).app)
+
+    assert client.post("/batch", json={}).status_code in (404, 405)
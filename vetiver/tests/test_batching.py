@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+
+from vetiver import mock, VetiverAPI
+from vetiver.batching import MicroBatcher
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+async def _post_concurrently(app, path, bodies):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        return await asyncio.gather(*[c.post(path, json=body) for body in bodies])
+
+
+def test_concurrent_requests_share_one_call(model):
+    calls = []
+
+    def row_ids(x):
+        calls.append(len(x))
+        return x["B"].tolist()
+
+    api = VetiverAPI(model, max_batch_rows=100, batch_timeout_ms=50)
+    api.vetiver_post(row_ids, "ids", batch=True)
+
+    bodies = [[{"B": i, "C": 0, "D": 0}, {"B": -i, "C": 0, "D": 0}] for i in range(5)]
+    responses = asyncio.run(_post_concurrently(api.app, "/ids", bodies))
+
+    assert calls == [10]
+    for i, response in enumerate(responses):
+        assert response.status_code == 200, response.text
+        assert response.json() == {"ids": [i, -i]}
+
+
+def test_batched_predict_matches_unbatched(model):
+    api = VetiverAPI(model, max_batch_rows=3, batch_timeout_ms=50)
+    bodies = [X.iloc[[i]].to_dict(orient="records") for i in range(5)]
+
+    responses = asyncio.run(_post_concurrently(api.app, "/predict", bodies))
+
+    expected = model.model.predict(X.iloc[:5]).tolist()
+    assert [r.json()["predict"][0] for r in responses] == pytest.approx(expected)
+
+
+def test_custom_endpoints_not_batched_by_default(model):
+    calls = []
+
+    def sum_values(x):
+        calls.append(len(x))
+        return x.sum().to_list()
+
+    api = VetiverAPI(model, max_batch_rows=100, batch_timeout_ms=50)
+    api.vetiver_post(sum_values, "sum")
+
+    bodies = [[{"B": 1, "C": 2, "D": 3}]] * 3
+    responses = asyncio.run(_post_concurrently(api.app, "/sum", bodies))
+
+    assert calls == [1, 1, 1]
+    assert all(r.json() == {"sum": [1, 2, 3]} for r in responses)
+
+
+def test_batcher_rejects_wrong_output_length():
+    async def predict(data):
+        return [0]
+
+    async def run():
+        batcher = MicroBatcher(predict, max_rows=10, timeout_ms=1)
+        frame = pd.DataFrame({"a": [1, 2]})
+        return await batcher.submit(frame)
+
+    with pytest.raises(ValueError, match="one prediction per row"):
+        asyncio.run(run())
+
+
+def test_single_flight_shares_identical_requests(model):
+    calls = []
+
+    def slow_sum(x):
+        calls.append(len(x))
+        time.sleep(0.2)
+        return x.sum().to_list()
+
+    api = VetiverAPI(model, single_flight=True)
+    api.vetiver_post(slow_sum, "sum")
+
+    same = [{"B": 1, "C": 2, "D": 3}]
+    bodies = [same] * 4 + [[{"B": 0, "C": 0, "D": 0}]]
+    responses = asyncio.run(_post_concurrently(api.app, "/sum", bodies))
+
+    assert sorted(calls) == [1, 1]
+    assert [r.json() for r in responses] == [{"sum": [1, 2, 3]}] * 4 + [
+        {"sum": [0, 0, 0]}
+    ]
+
+    asyncio.run(_post_concurrently(api.app, "/sum", [same]))
+    assert len(calls) == 3
@@ -0,0 +1,94 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+from vetiver.cache import PredictionCache
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def client(model, calls):
+    def row_sums(x):
+        calls.append(len(x))
+        return x.sum(axis=1).to_numpy()
+
+    api = VetiverAPI(model, cache_size=100)
+    api.vetiver_post(row_sums, "sums", cache=True)
+    client = TestClient(api.app)
+    client.api = api
+
+    return client
+
+
+def test_cache_scores_only_misses(client, calls):
+    first = client.post("/sums", json=[{"B": 1, "C": 1, "D": 1}])
+    second = client.post(
+        "/sums", json=[{"B": 2, "C": 2, "D": 2}, {"B": 1, "C": 1, "D": 1}]
+    )
+    third = client.post("/sums", json={"B": [2, 1], "C": [2, 1], "D": [2, 1]})
+
+    assert first.json() == {"sums": [3]}
+    assert second.json() == {"sums": [6, 3]}
+    assert third.json() == {"sums": [6, 3]}
+    assert calls == [1, 1]
+    assert client.api.cache_info()["sums"] == {
+        "hits": 3,
+        "misses": 2,
+        "size": 2,
+        "maxsize": 100,
+    }
+
+
+def test_cache_cleared_on_new_version(client, calls):
+    client.post("/sums", json=[{"B": 1, "C": 1, "D": 1}])
+    client.api.model.metadata.version = "2"
+    client.post("/sums", json=[{"B": 1, "C": 1, "D": 1}])
+
+    assert calls == [1, 1]
+
+
+def test_predict_cached_by_default(model):
+    api = VetiverAPI(model, cache_size=10)
+    client = TestClient(api.app)
+    data = X.head(3).to_dict("records")
+
+    assert (
+        client.post("/predict", json=data).json()
+        == client.post("/predict", json=data).json()
+    )
+    assert api.cache_info() == {
+        "predict": {"hits": 3, "misses": 3, "size": 3, "maxsize": 10}
+    }
+
+
+def test_cache_eviction_and_ttl(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("vetiver.cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(maxsize=2, ttl=10)
+
+    async def predict(data):
+        return data["x"].tolist()
+
+    async def run(values):
+        return await cache.predict(pd.DataFrame({"x": values}), predict)
+
+    asyncio.run(run([1, 2, 3]))
+    assert cache.info()["size"] == 2
+    asyncio.run(run([2, 3]))
+    assert cache.hits == 2
+
+    now[0] = 11.0
+    asyncio.run(run([2, 3]))
+    assert cache.hits == 2
+    assert cache.misses == 5
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverModel, VetiverAPI
+from vetiver.canary import TrafficSplit, _compare
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+def _model(target: float) -> VetiverModel:
+    model = mock.get_mock_model().fit(X, np.full(len(y), target))
+    return VetiverModel(model=model, prototype_data=X, model_name="my_model")
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_canary_answers_fraction_of_requests():
+    api = VetiverAPI(_model(1.0), candidate=_model(2.0), canary_fraction=1.0)
+    client = TestClient(api.app)
+    data = X.head(2).to_dict("records")
+
+    assert client.post("/predict", json=data).json() == {"predict": [2.0, 2.0]}
+    info = api.candidate_info()["predict"]
+    assert info["canary_requests"] == 1
+    assert info["primary_requests"] == 0
+
+
+def test_shadow_compares_off_the_response_path():
+    api = VetiverAPI(_model(1.0), candidate=_model(3.0), shadow=True)
+
+    with TestClient(api.app) as client:
+        for rows in [X.head(2), X.head(3)]:
+            response = client.post("/predict", json=rows.to_dict("records"))
+            assert set(response.json()["predict"]) == {1.0}
+        _wait_for(lambda: api.candidate_info()["predict"]["shadow_requests"] == 2)
+
+    info = api.candidate_info()["predict"]
+    assert info["primary_requests"] == 2
+    assert info["compared_rows"] == 5
+    assert info["disagreeing_rows"] == 5
+    assert info["mean_abs_diff"] == pytest.approx(2.0)
+    assert info["candidate_mean_seconds"] > 0
+
+
+def test_custom_endpoints_not_split():
+    api = VetiverAPI(_model(1.0), candidate=_model(2.0), canary_fraction=1.0)
+    api.vetiver_post(lambda x: x.sum().to_list(), "sum")
+
+    assert list(api.candidate_info()) == ["predict"]
+
+
+def test_slow_shadow_does_not_block_or_pile_up():
+    async def primary(data):
+        return [0] * len(data)
+
+    async def slow(data):
+        await asyncio.sleep(0.2)
+        return [1] * len(data)
+
+    async def run():
+        split = TrafficSplit(slow, shadow=True, max_in_flight=2)
+        start = time.monotonic()
+        for _ in range(3):
+            split.record_primary([1, 2], await primary([1, 2]), 0.0)
+        elapsed = time.monotonic() - start
+        await asyncio.gather(*split._tasks)
+        return split, elapsed
+
+    split, elapsed = asyncio.run(run())
+
+    assert elapsed < 0.1
+    assert split.shadow_requests == 2
+    assert split.shadow_dropped == 1
+    assert split.info()["disagreement_rate"] == 1.0
+
+
+@pytest.mark.parametrize(
+    "primary, candidate, expected",
+    [
+        ([1.0, 2.0], [1.0, 2.5], (2, 1, 0.5)),
+        ([[0.2, 0.8], [0.5, 0.5]], [[0.2, 0.8], [0.5, 0.5]], (2, 0, 0.0)),
+        (["a", "b", "c"], ["a", "x", "c"], (3, 1, 0.0)),
+        ([1, 2], [1, 2, 3], (2, 2, 0.0)),
+    ],
+)
+def test_compare(primary, candidate, expected):
+    assert _compare(primary, candidate) == expected
@@ -0,0 +1,101 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+from vetiver.batching import run_in_chunks
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+def test_predict_in_chunks(model):
+    data = X.head(10).to_dict("records")
+    expected = TestClient(VetiverAPI(model).app).post("/predict", json=data).json()
+
+    sizes = []
+    api = VetiverAPI(model, predict_chunk_rows=3)
+
+    def row_sums(x):
+        sizes.append(len(x))
+        return x.sum(axis=1).to_list()
+
+    api.vetiver_post(row_sums, "chunked", chunk=True)
+    api.vetiver_post(row_sums, "whole")
+    client = TestClient(api.app)
+
+    assert client.post("/predict", json=data).json() == expected
+    chunked = client.post("/chunked", json=data).json()
+    assert sizes == [3, 3, 3, 1]
+    assert chunked == {"chunked": X.head(10).sum(axis=1).to_list()}
+    client.post("/whole", json=data)
+    assert sizes[-1] == 10
+
+
+@pytest.mark.parametrize(
+    "output",
+    [
+        lambda x: x["B"].to_numpy(),
+        lambda x: x["B"],
+        lambda x: x[["B", "C"]],
+        lambda x: x["B"].to_list(),
+    ],
+)
+def test_run_in_chunks_joins_output(output):
+    async def predict(x):
+        return output(x)
+
+    joined = asyncio.run(run_in_chunks(predict, X.head(7), 2))
+    whole = output(X.head(7))
+
+    if isinstance(whole, (pd.Series, pd.DataFrame)):
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(joined), pd.DataFrame(whole).reset_index(drop=True)
+        )
+    else:
+        assert list(joined) == list(whole)
+
+
+def test_run_in_chunks_needs_row_output():
+    async def total(x):
+        return [x.sum().sum()]
+
+    with pytest.raises(ValueError, match="one prediction per row"):
+        asyncio.run(run_in_chunks(total, X.head(4), 2))
+
+
+def test_max_request_rows(model):
+    client = TestClient(VetiverAPI(model, max_request_rows=5).app)
+    data = X.head(6)
+
+    assert client.post("/predict", json=data.head(5).to_dict("records")).is_success
+    records = client.post("/predict", json=data.to_dict("records"))
+    columns = client.post("/predict", json=data.to_dict("list"))
+    ndjson = client.post(
+        "/predict",
+        content=data.to_json(orient="records", lines=True),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert records.status_code == 413
+    assert "more than the limit of 5" in records.json()["detail"]
+    assert columns.status_code == 413
+    assert ndjson.status_code == 413
+
+
+@pytest.mark.parametrize("fast_routes", [False, True])
+def test_max_request_rows_without_prototype(model, fast_routes):
+    api = VetiverAPI(
+        model, check_prototype=False, max_request_rows=5, fast_routes=fast_routes
+    )
+    api.vetiver_post(lambda x: [len(x)], "count")
+    client = TestClient(api.app)
+    records = X.head(6).to_dict("records")
+
+    assert client.post("/count", json=records[:5]).json() == {"count": [5]}
+    response = client.post("/count", json=records)
+    assert response.status_code == 413
+    assert "more than the limit of 5" in response.json()["detail"]
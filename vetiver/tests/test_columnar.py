@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+@pytest.fixture
+def client(model) -> TestClient:
+    return TestClient(VetiverAPI(model).app)
+
+
+@pytest.mark.parametrize("orient", ["list", "split"])
+def test_columnar_predict(client, model, orient):
+    data = X.head(10)
+    body = data.to_json(orient="split") if orient == "split" else data.to_dict("list")
+
+    if orient == "split":
+        response = client.post(
+            "/predict", content=body, headers={"Content-Type": "application/json"}
+        )
+    else:
+        response = client.post("/predict", json=body)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["predict"] == pytest.approx(model.model.predict(data))
+
+
+def test_columnar_matches_records(client):
+    data = X.head(5)
+    columns = client.post("/predict", json=data.to_dict("list")).json()
+    records = client.post("/predict", json=data.to_dict("records")).json()
+
+    assert columns == records
+
+
+def test_columnar_accepts_integral_floats(client):
+    response = client.post("/predict", json={"B": [1.0], "C": [2.0], "D": [3.0]})
+
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize(
+    "body,loc",
+    [
+        ({"B": [1], "C": [2]}, "D"),
+        ({"B": [1], "C": ["a"], "D": [3]}, "C"),
+        ({"B": [1.5], "C": [2], "D": [3]}, "B"),
+        ({"B": [1, None], "C": [2, 2], "D": [3, 3]}, "B"),
+    ],
+)
+def test_columnar_invalid_column(client, body, loc):
+    response = client.post("/predict", json=body)
+
+    assert response.status_code == 422
+    assert f"'{loc}'" in response.text
+
+
+def test_columnar_ragged(client):
+    response = client.post("/predict", json={"B": [1, 2], "C": [2], "D": [3]})
+
+    assert response.status_code == 422
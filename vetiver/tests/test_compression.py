@@ -0,0 +1,120 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI, predict
+from vetiver import compression
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+big = pd.concat([X] * 20, ignore_index=True)
+
+
+@pytest.fixture
+def client(model):
+    return TestClient(VetiverAPI(model).app)
+
+
+def test_gzip_request_body(client, model):
+    body = gzip.compress(big.to_json(orient="records").encode())
+    response = client.post(
+        "/predict",
+        content=body,
+        headers={"content-type": "application/json", "content-encoding": "gzip"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["predict"] == pytest.approx(
+        model.model.predict(big).tolist()
+    )
+
+
+def test_large_responses_compressed(client):
+    large = client.post(
+        "/predict",
+        json=big.to_dict("records"),
+        headers={"accept-encoding": "gzip"},
+    )
+    small = client.post(
+        "/predict",
+        json=X.head(1).to_dict("records"),
+        headers={"accept-encoding": "gzip"},
+    )
+
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert len(large.json()["predict"]) == len(big)
+    assert "content-encoding" not in small.headers
+
+
+def test_streamed_responses_compressed(client):
+    body = "\n".join(json.dumps(row) for row in big.to_dict("records"))
+    response = client.post(
+        "/predict",
+        content=body,
+        headers={"content-type": "application/x-ndjson", "accept-encoding": "gzip"},
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.text.splitlines()) == len(big)
+
+
+def test_unsupported_request_encoding(client):
+    response = client.post(
+        "/predict",
+        content=b"[]",
+        headers={"content-type": "application/json", "content-encoding": "br"},
+    )
+
+    assert response.status_code == 415
+
+
+@pytest.mark.parametrize("coding", ["gzip", "zstd"])
+def test_corrupt_request_body(client, coding):
+    if coding not in compression.codings():
+        pytest.skip("zstandard not installed")
+    response = client.post(
+        "/predict",
+        content=b"not compressed",
+        headers={"content-type": "application/json", "content-encoding": coding},
+    )
+
+    assert response.status_code == 400
+    assert "Could not decode" in response.text
+
+
+def test_compression_disabled(model):
+    client = TestClient(VetiverAPI(model, compression_min_size=None).app)
+    response = client.post(
+        "/predict", json=big.to_dict("records"), headers={"accept-encoding": "gzip"}
+    )
+
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.parametrize("coding", ["gzip", "zstd"])
+def test_predict_compresses_requests(client, model, coding):
+    if coding == "zstd" and not compression.zstd_exists:
+        pytest.skip("zstandard not installed")
+
+    response = predict(
+        endpoint="/predict", data=big, test_client=client, compression=coding
+    )
+
+    assert response["predict"].tolist() == pytest.approx(
+        model.model.predict(big).tolist()
+    )
+
+
+def test_zstd_preferred():
+    if not compression.zstd_exists:
+        pytest.skip("zstandard not installed")
+
+    assert compression.choose_coding("gzip, zstd") == "zstd"
+    assert compression.choose_coding("gzip, zstd;q=0") == "gzip"
+    body = compression.compress(b"x" * 2000, "zstd")
+    assert compression.decompress(body, "zstd") == b"x" * 2000
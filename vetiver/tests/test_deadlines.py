@@ -0,0 +1,139 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+
+from vetiver import VetiverAPI
+
+
+BODY = [{"B": 1, "C": 2, "D": 3}]
+
+
+async def slow_sum(x):
+    await asyncio.sleep(0.5)
+    return x.sum().to_list()
+
+
+async def _post(app, path, **kw):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        return await c.post(path, **kw)
+
+
+def test_client_deadline_is_408(model):
+    api = VetiverAPI(model)
+    api.vetiver_post(slow_sum, "sum")
+
+    response = asyncio.run(
+        _post(api.app, "/sum", json=BODY, headers={"X-Request-Timeout": "0.05"})
+    )
+
+    assert response.status_code == 408, response.text
+    assert api.app.router.routes[-1].stats.timeouts == 1
+
+
+def test_server_deadline_is_504(model):
+    api = VetiverAPI(model, request_timeout=0.05)
+    api.vetiver_post(slow_sum, "sum")
+
+    response = asyncio.run(_post(api.app, "/sum", json=BODY))
+
+    assert response.status_code == 504, response.text
+
+
+def test_within_deadline(model):
+    api = VetiverAPI(model, request_timeout=5)
+
+    response = asyncio.run(
+        _post(api.app, "/predict", json=BODY, headers={"X-Request-Timeout": "bad"})
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"predict": [44.47]}
+
+
+def test_queued_work_is_dropped(model):
+    release = threading.Event()
+    started = []
+
+    def blocking_sum(x):
+        started.append(len(x))
+        release.wait(5)
+        return x.sum().to_list()
+
+    api = VetiverAPI(model, max_workers=1)
+    api.vetiver_post(blocking_sum, "sum")
+
+    async def main():
+        blocked = asyncio.ensure_future(_post(api.app, "/sum", json=BODY))
+        while not started:
+            await asyncio.sleep(0.01)
+        queued = await _post(
+            api.app, "/sum", json=BODY * 2, headers={"X-Request-Timeout": "0.05"}
+        )
+        # let the cancellation reach the executor's queue
+        await asyncio.sleep(0.05)
+        release.set()
+        return await blocked, queued
+
+    blocked, queued = asyncio.run(main())
+    time.sleep(0.1)
+
+    assert blocked.status_code == 200
+    assert queued.status_code == 408
+    # the second request timed out while queued, so it never ran
+    assert started == [1]
+
+
+def test_disconnect_cancels_work(model):
+    cancelled = []
+
+    async def cancellable_sum(x):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return x.sum().to_list()
+
+    api = VetiverAPI(model, cancel_on_disconnect=True)
+    api.vetiver_post(cancellable_sum, "sum")
+    body = json.dumps(BODY).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/sum",
+        "raw_path": b"/sum",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    start = time.perf_counter()
+    asyncio.run(api.app(scope, receive, send))
+
+    assert time.perf_counter() - start < 2
+    assert sent[0]["status"] == 499
+    assert cancelled == [True]
+    assert api.app.router.routes[-1].stats.disconnects == 1
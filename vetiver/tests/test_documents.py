@@ -0,0 +1,57 @@
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import VetiverAPI
+
+
+@pytest.fixture
+def client(model):
+    api = VetiverAPI(model)
+    client = TestClient(api.app)
+    client.api = api
+
+    return client
+
+
+@pytest.mark.parametrize("path", ["/metadata", "/prototype", "/openapi.json"])
+def test_not_modified(client, path):
+    first = client.get(path, headers={"accept-encoding": "identity"})
+    etag = first.headers["etag"]
+    second = client.get(
+        path, headers={"accept-encoding": "identity", "if-none-match": etag}
+    )
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+
+def test_gzip_encoded_once(client):
+    response = client.get("/prototype", headers={"accept-encoding": "gzip"})
+    document = client.api._documents["prototype"]
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == document.gzip_etag
+    assert json.loads(gzip.decompress(document.gzipped)) == response.json()
+    assert response.json()["properties"]["B"]["type"] == "integer"
+
+
+def test_openapi_includes_later_endpoints(client):
+    client.get("/openapi.json")
+    client.api.vetiver_post(lambda x: x.sum().to_list(), "sum")
+
+    assert "/sum" in client.get("/openapi.json").json()["paths"]
+
+
+def test_documents_rerendered_for_new_model(client, model):
+    etag = client.get("/metadata").headers["etag"]
+    model.metadata.version = "2"
+    client.api._render_documents()
+    response = client.get("/metadata", headers={"if-none-match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["version"] == "2"
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import VetiverAPI
+
+
+def sum_values(x):
+    return x.sum().to_list()
+
+
+def thread_name(x):
+    return [threading.current_thread().name]
+
+
+async def async_thread_name(x):
+    return [threading.current_thread().name]
+
+
+@pytest.fixture
+def data():
+    return [{"B": 1, "C": 2, "D": 3}, {"B": 4, "C": 5, "D": 6}]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process", "event_loop"])
+def test_executor_predicts(executor, model, data):
+    api = VetiverAPI(model, executor=executor, max_workers=1)
+    api.vetiver_post(sum_values, "sum")
+
+    with TestClient(api.app) as client:
+        response = client.post("/sum", json=data)
+        predict = client.post("/predict", json=data)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"sum": [5, 7, 9]}
+    assert predict.status_code == 200, predict.text
+    assert len(predict.json()["predict"]) == 2
+
+
+def test_sync_endpoint_runs_off_event_loop(model, data):
+    api = VetiverAPI(model, executor="thread")
+    api.vetiver_post(thread_name, "thread")
+    api.vetiver_post(async_thread_name, "async_thread")
+
+    with TestClient(api.app) as client:
+        sync_thread = client.post("/thread", json=data).json()["thread"][0]
+        async_thread = client.post("/async_thread", json=data).json()["async_thread"][0]
+
+    assert sync_thread.startswith("vetiver")
+    assert not async_thread.startswith("vetiver")
+
+
+def test_invalid_executor(model):
+    with pytest.raises(ValueError, match="executor must be one of"):
+        VetiverAPI(model, executor="gpu")
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+@pytest.fixture
+def api(model) -> VetiverAPI:
+    api = VetiverAPI(model, fast_routes=True)
+    calls = []
+    fast_predict = api._fast_routes["/predict"]
+
+    async def counted(scope, receive, send):
+        handled = await fast_predict(scope, receive, send)
+        calls.append(handled)
+        return handled
+
+    api._fast_routes["/predict"] = counted
+    api.fast_calls = calls
+    return api
+
+
+@pytest.fixture
+def client(api) -> TestClient:
+    return TestClient(api.app)
+
+
+def test_fast_route_matches_fastapi_route(client, api, model):
+    data = X.head(10)
+    expected = TestClient(VetiverAPI(model).app).post(
+        "/predict", json=data.to_dict("records")
+    )
+
+    records = client.post("/predict", json=data.to_dict("records"))
+    columns = client.post("/predict", json=data.to_dict("list"))
+
+    assert records.status_code == 200, records.text
+    assert records.json() == expected.json()
+    assert columns.json() == expected.json()
+    assert api.fast_calls == [True, True]
+    assert api._metrics.endpoint("predict").requests == 2
+
+
+@pytest.mark.parametrize(
+    "body,error",
+    [
+        (b'[{"B": 1, "C": 2}]', "missing"),
+        (b"[{", "json_invalid"),
+        (b'"text"', "list_type"),
+    ],
+)
+def test_fast_route_invalid_input(client, body, error):
+    response = client.post(
+        "/predict", content=body, headers={"Content-Type": "application/json"}
+    )
+
+    assert response.status_code == 422, response.text
+    assert f"'type': '{error}'" in response.text
+
+
+def test_other_content_types_use_fastapi(client, api):
+    response = client.post(
+        "/predict",
+        content=X.head(2).to_json(orient="records", lines=True),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert api.fast_calls == [False]
+
+
+def test_fast_route_in_openapi_schema(client):
+    paths = client.get("/openapi.json").json()["paths"]
+
+    assert "post" in paths["/predict"]
+
+
+def test_fast_route_custom_endpoint_without_prototype(model):
+    def total(x):
+        if not x:
+            raise HTTPException(status_code=400, detail="no rows")
+        return [sum(row["B"] for row in x)]
+
+    api = VetiverAPI(model, check_prototype=False, fast_routes=True)
+    api.vetiver_post(total, "total")
+    client = TestClient(api.app)
+
+    assert client.post("/total", json=[{"B": 1}, {"B": 2}]).json() == {"total": [3]}
+    assert client.post("/total", json=[]).status_code == 400
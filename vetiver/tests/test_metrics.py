@@ -0,0 +1,92 @@
+import re
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+from vetiver.metrics import Histogram, Metrics
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+def _value(text: str, sample: str) -> float:
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{sample} not in metrics"
+    return float(match.group(1))
+
+
+def test_histogram_buckets_are_inclusive():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+def test_render_is_cumulative():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    stats = metrics.endpoint("predict")
+    stats.stages["predict"].observe(0.05)
+    stats.stages["predict"].observe(0.5)
+    stats.rows += 3
+    text = metrics.render()
+
+    labels = 'endpoint="predict",stage="predict"'
+    assert (
+        _value(text, f'vetiver_stage_duration_seconds_bucket{{{labels},le="0.1"}}') == 1
+    )
+    assert (
+        _value(text, f'vetiver_stage_duration_seconds_bucket{{{labels},le="1.0"}}') == 2
+    )
+    assert (
+        _value(text, f'vetiver_stage_duration_seconds_bucket{{{labels},le="+Inf"}}')
+        == 2
+    )
+    assert _value(text, f"vetiver_stage_duration_seconds_count{{{labels}}}") == 2
+    assert _value(text, 'vetiver_rows_total{endpoint="predict"}') == 3
+    assert "# TYPE vetiver_requests_in_flight gauge" in text
+
+
+def test_metrics_route(model):
+    api = VetiverAPI(model, show_metrics=True)
+    client = TestClient(api.app)
+
+    client.post("/predict", json=X.head(3).to_dict("records"))
+    client.post("/predict", json=X.head(2).to_dict("list"))
+    client.post("/predict", json=[{"B": "a", "C": 0, "D": 0}])
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert _value(text, 'vetiver_requests_total{endpoint="predict"}') == 3
+    assert _value(text, 'vetiver_errors_total{endpoint="predict"}') == 1
+    assert _value(text, 'vetiver_rows_total{endpoint="predict"}') == 5
+    assert _value(text, 'vetiver_requests_in_flight{endpoint="predict"}') == 0
+    for stage, count in [("parse", 3), ("validate", 2), ("predict", 2)]:
+        labels = f'endpoint="predict",stage="{stage}"'
+        assert (
+            _value(text, f"vetiver_stage_duration_seconds_count{{{labels}}}") == count
+        )
+
+
+@pytest.mark.parametrize("fast_routes", [False, True])
+def test_metrics_scalar_body(model, fast_routes):
+    api = VetiverAPI(model, check_prototype=False, fast_routes=fast_routes)
+    api.vetiver_post(lambda x: [x], "echo")
+    client = TestClient(api.app)
+
+    response = client.post("/echo", json=5)
+
+    assert response.json() == {"echo": [5]}
+    assert api._metrics.endpoint("echo").rows == 1
+
+
+def test_metrics_route_off_by_default(model):
+    client = TestClient(VetiverAPI(model).app)
+
+    assert client.get("/metrics").status_code == 404
@@ -0,0 +1,113 @@
+import numpy as np
+import pins
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, vetiver_pin_write, VetiverModel, VetiverMultiAPI
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+@pytest.fixture
+def board():
+    board = pins.board_temp(allow_pickle_read=True)
+    for i, name in enumerate(["east", "west", "north"]):
+        model = mock.get_mock_model().fit(X, np.full(len(y), float(i)))
+        vetiver_pin_write(board, VetiverModel(model, name, prototype_data=X))
+
+    return board
+
+
+def test_models_served_under_their_names(board):
+    api = VetiverMultiAPI(board)
+    client = TestClient(api.app)
+    data = X.head(2).to_dict("records")
+
+    assert client.get("/models").json()["loaded"] == []
+    assert client.post("/west/predict", json=data).json() == {"predict": [1.0, 1.0]}
+    assert client.post("/east/predict", json=data).json() == {"predict": [0.0, 0.0]}
+    assert client.get("/west/metadata").status_code == 200
+    assert client.get("/west/prototype").json()["properties"].keys() == {"B", "C", "D"}
+    models = client.get("/models").json()
+    assert sorted(models["available"]) == ["east", "north", "west"]
+    # most recently used last
+    assert models["loaded"] == ["east", "west"]
+
+
+def test_each_model_validates_its_own_prototype(board):
+    client = TestClient(VetiverMultiAPI(board).app)
+
+    response = client.post("/north/predict", json=[{"B": "a", "C": 0, "D": 0}])
+
+    assert response.status_code == 422
+
+
+def test_unknown_model(board):
+    client = TestClient(VetiverMultiAPI(board, model_names=["east"]).app)
+
+    assert client.post("/west/predict", json=[]).status_code == 404
+    assert client.get("/east/missing").status_code == 404
+    assert client.get("/ping").json() == {"ping": "pong"}
+
+
+def test_least_recently_used_evicted(board):
+    size = board.pin_meta("east").file_size
+    api = VetiverMultiAPI(board, memory_budget=2 * size)
+    client = TestClient(api.app)
+    data = X.head(1).to_dict("records")
+
+    client.post("/east/predict", json=data)
+    client.post("/west/predict", json=data)
+    client.post("/east/predict", json=data)
+    client.post("/north/predict", json=data)
+
+    assert client.get("/models").json()["loaded"] == ["east", "north"]
+    assert api.memory_used <= 2 * size
+    assert client.post("/west/predict", json=data).json() == {"predict": [1.0]}
+
+
+class UserBoard:
+    """Board whose pin names have a user prefix, as on Posit Connect"""
+
+    def __init__(self, board):
+        self.board = board
+        self.listed = 0
+
+    def pin_list(self):
+        self.listed += 1
+        return [f"user/{name}" for name in self.board.pin_list()]
+
+    def pin_read(self, name, version=None):
+        return self.board.pin_read(name.removeprefix("user/"), version)
+
+    def pin_meta(self, name, version=None):
+        return self.board.pin_meta(name.removeprefix("user/"), version)
+
+
+def test_names_with_a_slash(board):
+    user_board = UserBoard(board)
+    client = TestClient(VetiverMultiAPI(user_board).app)
+    data = X.head(1).to_dict("records")
+
+    response = client.post("/user/west/predict", json=data)
+
+    assert response.json() == {"predict": [1.0]}
+    assert client.get("/user/missing/predict").status_code == 404
+
+
+def test_pin_list_cached(board):
+    user_board = UserBoard(board)
+    client = TestClient(VetiverMultiAPI(user_board).app)
+
+    for _ in range(3):
+        assert client.get("/favicon.ico").status_code == 404
+    client.get("/models")
+
+    assert user_board.listed == 1
+
+
+def test_warmup_marks_models_ready(board):
+    client = TestClient(VetiverMultiAPI(board, warmup=2).app)
+
+    assert client.get("/east/ping").status_code == 200
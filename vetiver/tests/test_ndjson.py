@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+from vetiver.formats import iter_ndjson
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_ndjson_streams_in_chunks(model):
+    chunks = []
+
+    def row_ids(x):
+        chunks.append(len(x))
+        return x["B"].to_numpy()
+
+    api = VetiverAPI(model, stream_chunk_rows=4)
+    api.vetiver_post(row_ids, "ids")
+    client = TestClient(api.app)
+
+    body = X.head(10).to_json(orient="records", lines=True)
+    response = client.post("/ids", content=body, headers=NDJSON)
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert _lines(response) == [{"ids": b} for b in X.head(10)["B"].tolist()]
+    assert chunks == [4, 4, 2]
+
+
+def test_ndjson_predict_matches_json(model):
+    client = TestClient(VetiverAPI(model).app)
+    data = X.head(5)
+
+    stream = client.post(
+        "/predict", content=data.to_json(orient="records", lines=True), headers=NDJSON
+    )
+    batch = client.post("/predict", json=data.to_dict("records"))
+
+    assert [line["predict"] for line in _lines(stream)] == batch.json()["predict"]
+
+
+def test_ndjson_invalid_first_chunk(model):
+    client = TestClient(VetiverAPI(model).app)
+
+    response = client.post("/predict", content='{"B": 1}\n', headers=NDJSON)
+
+    assert response.status_code == 422
+
+
+def test_ndjson_invalid_later_chunk(model):
+    client = TestClient(VetiverAPI(model, stream_chunk_rows=1).app)
+    body = '{"B": 1, "C": 1, "D": 1}\n{"B": "a", "C": 1, "D": 1}\n'
+
+    response = client.post("/predict", content=body, headers=NDJSON)
+    lines = _lines(response)
+
+    assert response.status_code == 200
+    assert "predict" in lines[0]
+    assert lines[1]["detail"][0]["loc"] == ["body", 1, "B"]
+
+
+def test_ndjson_empty_body(model):
+    client = TestClient(VetiverAPI(model).app)
+
+    response = client.post("/predict", content=b"", headers=NDJSON)
+
+    assert response.status_code == 200
+    assert response.text == ""
+
+
+def test_ndjson_body_in_pieces(model):
+    # TestClient sends the whole body at once, so call the app directly
+    api = VetiverAPI(model, stream_chunk_rows=10)
+    lines = X.to_json(orient="records", lines=True).encode().splitlines()
+    messages = [
+        {"type": "http.request", "body": line + b"\n", "more_body": True}
+        for line in lines
+    ]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/predict",
+        "raw_path": b"/predict",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    body = []
+
+    async def receive():
+        if messages:
+            await asyncio.sleep(0)
+            return messages.pop(0)
+        await asyncio.sleep(1)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    asyncio.run(api.app(scope, receive, send))
+
+    predictions = b"".join(body).decode().splitlines()
+    assert len(predictions) == len(X)
+
+
+def test_iter_ndjson_lines_across_pieces():
+    body = X.head(5).to_json(orient="records", lines=True).encode() + b"\n\n"
+
+    async def pieces():
+        rest = body
+        while rest:
+            yield rest[:7]
+            rest = rest[7:]
+
+    async def parse():
+        return [chunk async for chunk in iter_ndjson(pieces(), 2)]
+
+    chunks = asyncio.run(parse())
+
+    assert [start for start, _ in chunks] == [0, 2, 4]
+    assert sum((rows for _, rows in chunks), []) == X.head(5).to_dict("records")
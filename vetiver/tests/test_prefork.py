@@ -0,0 +1,122 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+import requests
+
+from vetiver.prefork import THREAD_LIMIT_VARS, limit_threads
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+SERVER = textwrap.dedent(
+    """
+    import os
+    import sys
+    from vetiver import mock, VetiverModel, VetiverAPI
+
+    X, y = mock.get_mock_data()
+    model = VetiverModel(
+        mock.get_mock_model().fit(X, y), prototype_data=X, model_name="my_model"
+    )
+    # stands in for a large model, shared by the workers rather than copied
+    model.loaded_in = os.getpid()
+
+    def worker(x):
+        return [os.getpid(), model.loaded_in, os.environ["OMP_NUM_THREADS"]]
+
+    api = VetiverAPI(model)
+    api.vetiver_post(worker, "worker")
+    api.run(port=int(sys.argv[1]), workers=2, threads_per_worker=3, quiet_open=True)
+    """
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_limit_threads(monkeypatch):
+    for name in THREAD_LIMIT_VARS:
+        monkeypatch.delenv(name, raising=False)
+
+    limits = limit_threads(2)
+    if limits is not None:
+        limits.restore_original_limits()
+
+    assert all(os.environ[name] == "2" for name in THREAD_LIMIT_VARS)
+
+
+def test_prefork_workers_share_model(tmp_path):
+    port = _free_port()
+    script = tmp_path / "app.py"
+    script.write_text(SERVER)
+    server = subprocess.Popen([sys.executable, str(script), str(port)])
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                if requests.get(f"{url}/ping", timeout=1).ok:
+                    break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+
+        pid, loaded_in, threads = requests.post(
+            f"{url}/worker", json=[{"B": 0, "C": 0, "D": 0}], timeout=5
+        ).json()["worker"]
+
+        assert loaded_in == server.pid
+        assert pid != server.pid
+        assert threads == "3"
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(10)
+
+    assert server.returncode == 0
+
+
+FAILING_SERVER = textwrap.dedent(
+    """
+    import asyncio
+    import os
+    import sys
+    from fastapi import FastAPI
+    from vetiver.prefork import serve_prefork
+
+    app = FastAPI()
+
+    @app.on_event("startup")
+    async def startup():
+        if sys.argv[2] == "startup":
+            raise RuntimeError("broken startup")
+        # the worker starts, then crashes
+        asyncio.get_running_loop().call_later(0.05, os._exit, 1)
+
+    serve_prefork(app, workers=2, max_restarts=3, port=int(sys.argv[1]))
+    """
+)
+
+
+@pytest.mark.parametrize(
+    "failure, message",
+    [("startup", "failed to start"), ("crash", "exited 4 times")],
+)
+def test_prefork_gives_up(tmp_path, failure, message):
+    script = tmp_path / "app.py"
+    script.write_text(FAILING_SERVER)
+
+    result = subprocess.run(
+        [sys.executable, str(script), str(_free_port()), failure],
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+
+    assert result.returncode != 0
+    assert message in result.stderr
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pins
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, vetiver_pin_write, VetiverModel, VetiverAPI
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+def _pin(board, target):
+    model = mock.get_mock_model().fit(X, np.full(len(y), target))
+    v = VetiverModel(model=model, prototype_data=X, model_name="model")
+    if board.pin_exists("model"):
+        # pin versions are named by their creation time, in seconds
+        time.sleep(1)
+    vetiver_pin_write(board, v)
+
+
+@pytest.fixture
+def board():
+    board = pins.board_temp(versioned=True, allow_pickle_read=True)
+    _pin(board, 1.0)
+
+    return board
+
+
+def test_reload_swaps_model(board):
+    api = VetiverAPI(VetiverModel.from_pin(board, "model"), board=board)
+    api.vetiver_post(lambda x: x.sum().to_list(), "sum")
+    client = TestClient(api.app)
+    data = X.head(2).to_dict("records")
+
+    assert not api.reload()
+    assert client.post("/predict", json=data).json() == {"predict": [1.0, 1.0]}
+
+    _pin(board, 2.0)
+    assert api.reload()
+    assert client.post("/predict", json=data).json() == {"predict": [2.0, 2.0]}
+    assert client.get("/metadata").json()["version"] == api.model.metadata.version
+    assert client.post("/sum", json=[{"B": 1, "C": 2, "D": 3}]).json() == {
+        "sum": [1, 2, 3]
+    }
+    # endpoints are replaced, not added again
+    assert [route.path for route in api.app.routes].count("/predict") == 1
+
+
+def test_failed_warmup_keeps_current_model(board):
+    api = VetiverAPI(VetiverModel.from_pin(board, "model"), board=board)
+    version = api.model.metadata.version
+    api.warmup_data = pd.DataFrame({"B": ["not a number"], "C": [0], "D": [0]})
+
+    _pin(board, 2.0)
+    with pytest.raises(Exception):
+        api.reload()
+
+    assert api.model.metadata.version == version
+    response = TestClient(api.app).post("/predict", json=X.head(1).to_dict("records"))
+    assert response.json() == {"predict": [1.0]}
+
+
+def test_board_watched_in_background(board):
+    api = VetiverAPI(
+        VetiverModel.from_pin(board, "model"), board=board, reload_interval=0.05
+    )
+    version = api.model.metadata.version
+
+    with TestClient(api.app) as client:
+        _pin(board, 2.0)
+        deadline = time.monotonic() + 5
+        while client.get("/metadata").json()["version"] == version:
+            assert time.monotonic() < deadline, "model was not reloaded"
+            time.sleep(0.05)
+
+        response = client.post("/predict", json=X.head(1).to_dict("records"))
+        assert response.json() == {"predict": [2.0]}
+
+
+@pytest.mark.parametrize("fast_routes", [False, True])
+def test_reload_during_upload_keeps_prototype(fast_routes):
+    model = mock.get_mock_model().fit(X, y)
+    api = VetiverAPI(
+        VetiverModel(model, "model", prototype_data=X), fast_routes=fast_routes
+    )
+    renamed = X.rename(columns={"B": "E", "C": "F", "D": "G"})
+    new_model = VetiverModel(
+        mock.get_mock_model().fit(renamed, y), "model", prototype_data=renamed
+    )
+    body = X.head(3).to_json(orient="records").encode()
+    messages = [
+        {"type": "http.request", "body": body, "more_body": True},
+        {"type": "http.request", "body": b"", "more_body": False},
+    ]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/predict",
+        "raw_path": b"/predict",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    sent = []
+
+    async def receive():
+        if len(messages) == 2:
+            # the model is swapped while the body is still being read
+            api._swap_model(new_model)
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(1)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(api.app(scope, receive, send))
+
+    assert sent[0]["status"] == 200
+    assert api.model is new_model
@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverModel, VetiverAPI
+from vetiver import formats
+from vetiver.data import mtcars
+from vetiver.handlers.base import BaseHandler
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param and not formats.orjson_exists:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(formats, "orjson_exists", request.param)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        {"predict": np.array([1.5, 2.0])},
+        {"predict": np.array([[0.25, 0.75], [1.0, 0.0]])},
+        {"predict": np.array([0.1, 0.2], dtype=np.float32)},
+        {"predict": [np.int64(1), np.float64(2.5)]},
+        pd.Series([{"a": 1}, {"a": 2}]),
+    ],
+)
+def test_dumps_matches_default_encoding(encoder, content):
+    expected = jsonable_encoder(
+        (
+            {k: v.tolist() for k, v in content.items()}
+            if isinstance(content, dict) and hasattr(content["predict"], "tolist")
+            else content
+        ),
+        custom_encoder={np.generic: lambda value: value.item()},
+    )
+
+    assert json.loads(formats.dumps(content)) == json.loads(json.dumps(expected))
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        {"predict": np.array([np.nan, 1.0, np.inf])},
+        {"predict": [float("nan"), np.float32(1.0), -np.inf]},
+        {"predict": np.array([[np.nan], [1.0], [-np.inf]], dtype=np.float32)},
+    ],
+)
+def test_dumps_non_finite_as_null(encoder, content):
+    output = json.loads(formats.dumps(content), parse_constant=str)
+
+    assert np.ravel(output["predict"]).tolist() == [None, 1.0, None]
+
+
+def test_handler_as_array(model):
+    prediction = model.handler_predict(X.head(3), check_prototype=True, as_array=True)
+
+    assert isinstance(prediction, np.ndarray)
+    assert prediction.tolist() == model.handler_predict(X.head(3), True)
+
+
+class ForwardingHandler(BaseHandler):
+    def handler_predict(self, input_data, check_prototype, **kw):
+        return self.model.predict(input_data, **kw).tolist()
+
+
+def test_custom_handler_not_given_as_array():
+    model = mock.get_mock_model().fit(X, y)
+    v = VetiverModel(ForwardingHandler(model, X), "model", prototype_data=X)
+    client = TestClient(VetiverAPI(v).app)
+
+    response = client.post("/predict", json=X.head(2).to_dict("records"))
+
+    assert response.status_code == 200
+    assert len(response.json()["predict"]) == 2
+
+
+def test_predict_proba_response(encoder):
+    data = mtcars.drop(columns="cyl")
+    classifier = mock.get_mtcars_model()
+    api = VetiverAPI(VetiverModel(classifier, "model", prototype_data=data))
+    api.vetiver_post("predict_proba")
+    client = TestClient(api.app)
+
+    response = client.post("/predict_proba", json=data.head(2).to_dict("records"))
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "predict_proba": classifier.predict_proba(data.head(2)).tolist()
+    }
@@ -0,0 +1,280 @@
+import asyncio
+import gzip
+import json
+
+import numpy as np
+import pytest
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+from vetiver.formats import RecordStream
+from vetiver.prototype import PrototypeValidator
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+def pieces(body: bytes, size: int):
+    while body:
+        yield body[:size]
+        body = body[size:]
+
+
+@pytest.mark.parametrize("size", [1, 7, 10_000])
+def test_record_stream(model, size):
+    data = X.head(10)
+    body = json.dumps(data.to_dict("records"), indent=1).encode()
+    parser = RecordStream(PrototypeValidator(model.prototype), chunk_rows=3)
+
+    for piece in pieces(body, size):
+        parser.feed(piece)
+    frame = parser.close()
+
+    assert parser.rows == 10
+    assert frame.equals(data.reset_index(drop=True))
+
+
+@pytest.mark.parametrize(
+    "body, error",
+    [
+        (b'{"B": [1]}', "list_type"),
+        (b'[{"B": 1, "C": 2, "D": 3}, 4]', "dict_type"),
+        (b'[{"B": 1, "C": 2, "D": 3}, ]', "json_invalid"),
+        (b'[{"B": 1, "C": 2, "D": 3} {"B": 1}]', "json_invalid"),
+        (b'[{"B": 1, "C": 2, "D": 3}] []', "json_invalid"),
+        (b'[{"B": 1, "C": 2, "D": 3}', "json_invalid"),
+        (b'[{"B": 1, "C": 2, "D": 3}, {"B": 1, "C": 2}]', "missing"),
+    ],
+)
+def test_record_stream_errors(model, body, error):
+    parser = RecordStream(PrototypeValidator(model.prototype))
+
+    with pytest.raises(RequestValidationError) as e:
+        for piece in pieces(body, 4):
+            parser.feed(piece)
+        parser.close()
+
+    assert e.value.errors()[0]["type"] == error
+
+
+def test_record_stream_invalid_record_fails_early(model):
+    parser = RecordStream(PrototypeValidator(model.prototype))
+
+    # raised before the rest of the body is read
+    with pytest.raises(RequestValidationError) as e:
+        parser.feed(b'[{"B": 1, "C": 2, "D": 3}, {"B": 1 "C": 2, "D": 3}, {"B": ')
+
+    assert e.value.errors()[0]["loc"] == ("body", 1)
+
+
+def test_record_stream_tokens_cut_short(model):
+    # strings with braces and escapes, literals and numbers split at every byte
+    record = {"B": -1, "C": 2, "D": 3, "s": "a}\u00e9\"", "t": True, "x": -2.5e-3}
+    body = json.dumps([record] * 3).encode()
+    parser = RecordStream(PrototypeValidator(model.prototype), chunk_rows=2)
+
+    for piece in pieces(body, 1):
+        parser.feed(piece)
+
+    assert parser.close()["B"].tolist() == [-1] * 3
+
+
+def test_record_stream_bulk_parse_once_per_piece(model, monkeypatch):
+    runs = []
+    parse_run = RecordStream._parse_run
+
+    def spy(self, text, pos):
+        runs.append(pos)
+        return parse_run(self, text, pos)
+
+    monkeypatch.setattr(RecordStream, "_parse_run", spy)
+    body = json.dumps([{"B": 1, "C": 2, "D": 3, "s": "}"}] * 50).encode()
+    parser = RecordStream(PrototypeValidator(model.prototype))
+
+    # the first piece ends inside a string, after a closing brace
+    parser.feed(body[:-4])
+    parser.feed(body[-4:])
+
+    assert len(runs) == 2
+    assert parser.close().shape == (50, 3)
+
+
+def test_record_stream_empty_array(model):
+    parser = RecordStream(PrototypeValidator(model.prototype))
+
+    parser.feed(b" [ ] ")
+    frame = parser.close()
+
+    assert frame.empty
+    assert frame.columns.tolist() == ["B", "C", "D"]
+    assert frame.dtypes.tolist() == [X.dtypes["B"]] * 3
+
+
+@pytest.mark.parametrize("fast_routes", [False, True])
+def test_empty_array(model, fast_routes):
+    client = TestClient(VetiverAPI(model, fast_routes=fast_routes).app)
+
+    response = client.post("/predict", json=[])
+
+    assert response.json() == {"predict": []}
+
+
+def test_record_stream_row_numbers(model):
+    records = X.head(5).to_dict("records")
+    records[3]["B"] = "a"
+    parser = RecordStream(PrototypeValidator(model.prototype), chunk_rows=2)
+
+    with pytest.raises(RequestValidationError) as e:
+        parser.feed(json.dumps(records).encode())
+
+    assert e.value.errors()[0]["loc"][:2] == ("body", 3)
+
+
+@pytest.mark.parametrize("fast_routes", [False, True])
+def test_streamed_request_body(model, fast_routes):
+    data = X.head(10).to_dict("records")
+    expected = TestClient(VetiverAPI(model).app).post("/predict", json=data).json()
+    api = VetiverAPI(model, stream_chunk_rows=3, fast_routes=fast_routes)
+    client = TestClient(api.app)
+
+    response = client.post(
+        "/predict",
+        content=pieces(json.dumps(data).encode(), 16),
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.json() == expected
+    stages = api._metrics.endpoint("predict").stages
+    assert stages["parse"].count == 1
+    assert stages["validate"].count == 1
+
+
+@pytest.mark.parametrize("fast_routes", [False, True])
+@pytest.mark.parametrize("rows, batched", [(1, False), (100, True)])
+def test_short_requests_validated_by_prototype(
+    model, monkeypatch, fast_routes, rows, batched
+):
+    batches = []
+    check_batch = PrototypeValidator.__call__
+
+    def spy(self, data):
+        batches.append(len(data))
+        return check_batch(self, data)
+
+    monkeypatch.setattr(PrototypeValidator, "__call__", spy)
+    client = TestClient(VetiverAPI(model, fast_routes=fast_routes).app)
+
+    response = client.post("/predict", json=X.head(rows).to_dict("records"))
+
+    assert len(response.json()["predict"]) == rows
+    assert batches == ([rows] if batched else [])
+
+
+def post_in_pieces(app, body_pieces: list) -> tuple:
+    """POST a chunked body straight to an ASGI app, one piece per message
+
+    Returns the response status and the number of pieces the app read.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/predict",
+        "raw_path": b"/predict",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    messages = [
+        {"type": "http.request", "body": piece, "more_body": True}
+        for piece in body_pieces
+    ]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+    read = 0
+    sent = []
+
+    async def receive():
+        nonlocal read
+        if read < len(messages):
+            read += 1
+            return messages[read - 1]
+        await asyncio.sleep(1)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], read
+
+
+@pytest.mark.parametrize("fast_routes", [False, True])
+def test_max_request_rows_stops_reading(model, fast_routes):
+    api = VetiverAPI(
+        model, max_request_rows=5, stream_chunk_rows=2, fast_routes=fast_routes
+    )
+    record = json.dumps(X.iloc[0].to_dict()).encode()
+    body_pieces = [b"[" + record] + [b"," + record] * 99 + [b"]"]
+
+    status, read = post_in_pieces(api.app, body_pieces)
+
+    assert status == 413
+    assert read == 6
+
+
+def test_invalid_row_stops_reading(model):
+    api = VetiverAPI(model, stream_chunk_rows=2)
+    record = json.dumps(X.iloc[0].to_dict()).encode()
+    body_pieces = [b"[" + record, b',{"B": "a"}'] + [b"," + record] * 98 + [b"]"]
+
+    status, read = post_in_pieces(api.app, body_pieces)
+
+    assert status == 422
+    assert read == 2
+
+
+def test_max_body_size_stops_reading(model):
+    api = VetiverAPI(model, max_body_size=1000)
+
+    status, read = post_in_pieces(api.app, [b" " * 100] * 100)
+
+    assert status == 413
+    assert read == 11
+
+
+def test_max_body_size(model):
+    client = TestClient(VetiverAPI(model, max_body_size=1000).app)
+    small = json.dumps(X.head(2).to_dict("records")).encode()
+    large = json.dumps(X.head(50).to_dict("records")).encode()
+
+    assert client.post("/predict", content=small).is_success
+    response = client.post("/predict", content=large)
+    assert response.status_code == 413
+    assert "limit of 1000 bytes" in response.text
+    # without a Content-Length, the body is counted as it is read
+    response = client.post(
+        "/predict",
+        content=pieces(large, 100),
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 413
+
+
+def test_max_body_size_decompressed(model):
+    client = TestClient(VetiverAPI(model, max_body_size=1000).app)
+    body = json.dumps(X.head(50).to_dict("records")).encode()
+    compressed = gzip.compress(body)
+    assert len(compressed) < 1000
+
+    response = client.post(
+        "/predict",
+        content=compressed,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 413
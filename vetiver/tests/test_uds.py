@@ -0,0 +1,66 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+import pandas as pd
+import pytest
+
+from vetiver import mock, predict, vetiver_endpoint
+from vetiver.server import _split_unix_endpoint, _unix_client
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="requires Unix domain sockets"
+)
+
+SERVER = textwrap.dedent(
+    """
+    import sys
+    from vetiver import mock, VetiverModel, VetiverAPI
+
+    X, y = mock.get_mock_data()
+    model = VetiverModel(
+        mock.get_mock_model().fit(X, y), prototype_data=X, model_name="my_model"
+    )
+    VetiverAPI(model).run(uds=sys.argv[1])
+    """
+)
+
+
+def test_split_unix_endpoint():
+    assert _split_unix_endpoint("unix:///tmp/v.sock:/sum") == (
+        "/tmp/v.sock",
+        "http://localhost/sum",
+    )
+    assert _split_unix_endpoint("unix:///tmp/v.sock") == (
+        "/tmp/v.sock",
+        "http://localhost/predict",
+    )
+
+
+def test_predict_over_unix_socket(tmp_path):
+    socket_path = str(tmp_path / "vetiver.sock")
+    script = tmp_path / "app.py"
+    script.write_text(SERVER)
+    server = subprocess.Popen([sys.executable, str(script), socket_path])
+    endpoint = vetiver_endpoint(f"unix://{socket_path}:/predict/")
+    try:
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.1)
+
+        X, _ = mock.get_mock_data()
+        first = predict(endpoint, X)
+        second = predict(endpoint, X.iloc[0])
+
+        assert len(first) == len(X)
+        assert isinstance(second, pd.DataFrame)
+        assert len(second) == 1
+        # both calls went through the same pooled client
+        assert _unix_client(socket_path) is _unix_client(socket_path)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(10)
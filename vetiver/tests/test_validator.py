@@ -0,0 +1,161 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, conint, constr, field_validator
+
+from vetiver import mock, VetiverModel, VetiverAPI, vetiver_create_prototype
+from vetiver.prototype import PrototypeValidator, PrototypeValidationError
+
+
+class Constrained(BaseModel):
+    B: conint(gt=42)
+    C: Optional[float] = None
+    D: constr(max_length=3) = "abc"
+
+
+class WithValidator(BaseModel):
+    B: int
+    C: int
+    D: int
+
+    @field_validator("B")
+    def b_is_even(cls, value):
+        assert value % 2 == 0
+        return value
+
+
+@pytest.fixture
+def validator():
+    df = pd.DataFrame({"x": [1], "y": [1.5], "s": ["a"], "b": [True]})
+    return PrototypeValidator(vetiver_create_prototype(df))
+
+
+def test_validator_coerces_and_orders(validator):
+    data = pd.DataFrame(
+        {
+            "extra": [0, 0],
+            "b": [True, False],
+            "s": ["a", "b"],
+            "y": [1, 2],
+            "x": [1.0, 2],
+        }
+    )
+
+    out = validator(data)
+
+    assert validator.exact
+    assert list(out.columns) == ["x", "y", "s", "b"]
+    assert out.dtypes.tolist() == ["int64", "float64", "object", "bool"]
+
+
+def test_validator_numpy(validator):
+    arr = np.array([[1, 1.5, "a", True]], dtype=object)
+
+    assert validator(arr).shape == (1, 4)
+    with pytest.raises(PrototypeValidationError, match="shape"):
+        validator(np.ones((2, 3)))
+
+
+@pytest.mark.parametrize(
+    "column,values,loc",
+    [
+        ("x", [1, 1.5], ("body", 1, "x")),
+        ("y", [1.0, None], ("body", 1, "y")),
+        ("s", ["a", 1], ("body", 1, "s")),
+        ("b", [2, True], ("body", 0, "b")),
+    ],
+)
+def test_validator_reports_first_bad_row(validator, column, values, loc):
+    data = pd.DataFrame(
+        {"x": [1, 2], "y": [1.0, 2.0], "s": ["a", "b"], "b": [True] * 2}
+    )
+    data[column] = pd.Series(values, dtype=object)
+
+    with pytest.raises(PrototypeValidationError) as e:
+        validator(data)
+
+    assert e.value.errors()[0]["loc"] == loc
+
+
+def test_validator_coerces_like_pydantic(validator):
+    data = pd.DataFrame(
+        {
+            "x": pd.Series(["1", True, 3], dtype=object),
+            "y": pd.Series(["1.5", False, 2], dtype=object),
+            "s": ["a", "b", "c"],
+            "b": pd.Series(["true", 0, True], dtype=object),
+        }
+    )
+
+    out = validator(data)
+
+    assert out["x"].tolist() == [1, 1, 3]
+    assert out["y"].tolist() == [1.5, 0.0, 2.0]
+    assert out["b"].tolist() == [True, False, True]
+    assert out.dtypes.tolist() == ["int64", "float64", "object", "bool"]
+    with pytest.raises(PrototypeValidationError, match="valid int"):
+        validator(data.assign(x=pd.Series(["1", "one", 3], dtype=object)))
+
+
+def test_validator_nan_policy():
+    df = pd.DataFrame({"x": [1.0]})
+    validator = PrototypeValidator(vetiver_create_prototype(df), nan_policy="allow")
+
+    assert validator(pd.DataFrame({"x": [np.nan]}))["x"].isna().all()
+
+
+def test_validator_constraints_and_defaults():
+    validator = PrototypeValidator(Constrained)
+    out = validator(pd.DataFrame({"B": [43, 50], "C": [None, 1.0]}))
+
+    assert validator.exact
+    assert out["D"].tolist() == ["abc", "abc"]
+    with pytest.raises(PrototypeValidationError, match="gt"):
+        validator(pd.DataFrame({"B": [43, 42]}))
+    with pytest.raises(PrototypeValidationError, match="max_length"):
+        validator(pd.DataFrame({"B": [43], "D": ["abcd"]}))
+
+
+def test_validator_not_exact_with_custom_validators():
+    assert not PrototypeValidator(WithValidator).exact
+
+
+@pytest.mark.parametrize("fast_routes", [False, True])
+@pytest.mark.parametrize("orient", ["records", "list", "arrow"])
+def test_custom_validator_use_pydantic(orient, fast_routes):
+    X, y = mock.get_mock_data()
+    model = mock.get_mock_model().fit(X, y)
+    v = VetiverModel(model, "model", prototype_data=X)
+    v.prototype = WithValidator
+    client = TestClient(VetiverAPI(v, fast_routes=fast_routes).app)
+    data = pd.DataFrame({"B": [2, 1], "C": [1, 1], "D": [1, 1]})
+
+    if orient == "arrow":
+        pytest.importorskip("pyarrow")
+        from vetiver.formats import ARROW_STREAM, to_arrow
+
+        response = client.post(
+            "/predict",
+            content=to_arrow(data, None),
+            headers={"Content-Type": ARROW_STREAM},
+        )
+    else:
+        response = client.post("/predict", json=data.to_dict(orient))
+
+    assert response.status_code == 422
+    assert "Assertion failed" in response.text
+    assert "('body', 1, 'B')" in response.text
+
+
+@pytest.mark.parametrize("fast_routes", [False, True])
+@pytest.mark.parametrize("value", ["1", True])
+def test_records_coerced_like_pydantic(model, value, fast_routes):
+    client = TestClient(VetiverAPI(model, fast_routes=fast_routes).app)
+
+    response = client.post("/predict", json=[{"B": value, "C": 0, "D": 0}])
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()["predict"]) == 1
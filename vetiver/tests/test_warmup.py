@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+def _wait_until_ready(client, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/ping")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.01)
+    raise TimeoutError("API did not become ready")
+
+
+def test_warmup_calls_every_endpoint(model):
+    calls = []
+
+    def row_count(x):
+        calls.append(x.columns.tolist())
+        return [len(x)]
+
+    api = VetiverAPI(model, warmup=2)
+    api.vetiver_post(row_count, "count")
+
+    with TestClient(api.app) as client:
+        assert _wait_until_ready(client).json() == {"ping": "pong"}
+
+    assert calls == [["B", "C", "D"]] * 2
+    assert api.ready
+
+
+def test_ping_unavailable_until_warm(model):
+    release = asyncio.Event()
+
+    async def blocked(x):
+        await release.wait()
+        return [0] * len(x)
+
+    api = VetiverAPI(model, warmup=1, warmup_data=X.head(2))
+    api.vetiver_post(blocked, "blocked")
+
+    with TestClient(api.app) as client:
+        response = client.get("/ping")
+        assert response.status_code == 503
+        assert response.json() == {"ping": "warming up"}
+
+        client.portal.call(release.set)
+        _wait_until_ready(client)
+
+
+def test_failed_warmup_still_becomes_ready(model):
+    def broken(x):
+        raise ValueError("broken")
+
+    api = VetiverAPI(model, warmup=1, cache_size=10)
+    api.vetiver_post(broken, "broken")
+
+    with TestClient(api.app) as client:
+        _wait_until_ready(client)
+
+    assert api.cache_info()["predict"]["size"] == 0
+
+
+def test_no_warmup_ready_immediately(model):
+    client = TestClient(VetiverAPI(model).app)
+
+    assert client.get("/ping").json() == {"ping": "pong"}
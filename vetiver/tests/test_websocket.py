@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from vetiver import mock, VetiverAPI
+
+np.random.seed(500)
+X, y = mock.get_mock_data()
+
+
+@pytest.fixture
+def client(model):
+    api = VetiverAPI(model, websocket=True)
+    api.vetiver_post(lambda x: x.sum().to_list(), "sum")
+
+    return TestClient(api.app)
+
+
+def test_websocket_predict(client, model):
+    expected = model.model.predict(X.head(3)).tolist()
+
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"id": 1, "data": X.head(3).to_dict("records")})
+        ws.send_json({"id": 2, "data": X.head(3).to_dict("list")})
+        replies = [ws.receive_json(), ws.receive_json()]
+
+    replies = sorted(replies, key=lambda reply: reply["id"])
+    assert replies[0]["predict"] == pytest.approx(expected)
+    assert replies[1]["predict"] == pytest.approx(expected)
+
+
+def test_websocket_custom_endpoint(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"id": "a", "endpoint": "sum", "data": [{"B": 1, "C": 2, "D": 3}]})
+
+        assert ws.receive_json() == {"id": "a", "sum": [1, 2, 3]}
+
+
+def test_websocket_errors_keep_connection_open(client):
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"id": 1, "data": [{"B": "a", "C": 0, "D": 0}]})
+        invalid = ws.receive_json()
+        ws.send_json({"id": 2, "endpoint": "missing", "data": []})
+        missing = ws.receive_json()
+        ws.send_text("not json")
+        malformed = ws.receive_json()
+        ws.send_json({"id": 3, "endpoint": "sum", "data": [{"B": 1, "C": 1, "D": 1}]})
+        ok = ws.receive_json()
+
+    assert invalid["id"] == 1 and invalid["detail"][0]["loc"][-1] == "B"
+    assert missing == {"id": 2, "detail": "Unknown endpoint missing"}
+    assert malformed["id"] is None
+    assert ok == {"id": 3, "sum": [1, 1, 1]}
+
+
+def test_websocket_off_by_default(model):
+    client = TestClient(VetiverAPI(model).app)
+
+    assert "/ws" not in [route.path for route in client.app.routes]
+
+
+def test_websocket_scalar_without_prototype(model):
+    api = VetiverAPI(model, websocket=True, check_prototype=False)
+    api.vetiver_post(lambda x: [x], "echo")
+    client = TestClient(api.app)
+
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"id": 1, "endpoint": "echo", "data": 5})
+
+        assert ws.receive_json() == {"id": 1, "echo": [5]}
@@ -39,3 +39,21 @@ vetiver_api = vetiver.VetiverAPI(v)
 api = vetiver_api.app
 """
         )
+
+
+def test_write_app_uds(vetiver_model_creation):
+    with TemporaryDirectory() as tempdir:
+        file = Path(tempdir, "app.py")
+        model_board = pins.board_folder(path=tempdir, allow_pickle_read=True)
+        vetiver.vetiver_pin_write(model_board, vetiver_model_creation)
+        vetiver.write_app(model_board, "model", file=file, uds="/tmp/vetiver.sock")
+        contents = open(file).read()
+
+        assert contents.endswith(
+            """
+api = vetiver_api.app
+
+if __name__ == "__main__":
+    vetiver_api.run(uds='/tmp/vetiver.sock')
+"""
+        )
@@ -52,7 +52,12 @@ def vetiver_write_app(board, pin_name: str, version: str = None, file: str = "ap
 
 
 def write_app(
-    board, pin_name: str, version: str = None, file: str = "app.py", overwrite=False
+    board,
+    pin_name: str,
+    version: str = None,
+    file: str = "app.py",
+    overwrite=False,
+    uds: str = None,
 ):
     """Write VetiverAPI app to a file
 
@@ -66,6 +71,9 @@ def write_app(
         Pins version of VetiverModel
     file :
         Name of file
+    uds :
+        Path of a Unix domain socket. If set, running the file with `python`
+        serves the API on this socket.
 
     Examples
     -------
@@ -118,6 +126,11 @@ b = pins.{load_board}
 
 vetiver_api = vetiver.VetiverAPI(v)
 api = vetiver_api.app
+"""
+    if uds is not None:
+        app += f"""
+if __name__ == "__main__":
+    vetiver_api.run(uds={repr(uds)})
 """
 
     f.write(app)